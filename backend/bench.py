@@ -0,0 +1,333 @@
+#end-to-end load benchmark for the backend routes
+#
+#seeds a local mongo database with users and tournaments, starts the leetcode stand-in
+#(synthesize mode) and the backend as subprocesses, drives the real routes with concurrent
+#clients and prints per-route throughput and p50/p95/p99 latency as json.
+#
+#python bench.py --users 500 --tournaments 50 --participants 20 --requests 2000 --concurrency 50
+#
+#the seeded database is dropped and recreated every run, so never point --db at real data.
+#use --base-url to benchmark an already running backend (it must use the same --db).
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from pymongo import AsyncMongoClient
+from dotenv import load_dotenv
+
+from leetcode_standin import synthesize_user
+
+load_dotenv()
+
+
+def profile_from_matched_user(matched_user: dict) -> dict:
+    stats = matched_user["submitStats"]["acSubmissionNum"]
+    return {
+        "totalSolved": stats[0]["count"],
+        "easySolved": stats[1]["count"],
+        "mediumSolved": stats[2]["count"],
+        "hardSolved": stats[3]["count"],
+        "lastUpdated": datetime.utcnow().isoformat(),
+    }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    #nearest-rank percentile
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def seed(mongo_url: str, db_name: str, users: int, tournaments: int, participants: int) -> dict:
+    """
+    Drops `db_name` and fills it with `users` linked users and `tournaments` x `participants` tournaments.
+    Returns the ids the scenarios need.
+    """
+    client = AsyncMongoClient(mongo_url)
+    await client.drop_database(db_name)
+    db = client[db_name]
+
+    user_docs = []
+    for i in range(users):
+        lc_username = f"bench_user_{i}"
+        user_docs.append(
+            {
+                "username": f"bench{i}",
+                "email": f"bench{i}@example.com",
+                "password": "bench",
+                "points": 1_000_000,
+                "streakSaves": 0,
+                "lcUsername": lc_username,
+                "leetcodeProfile": profile_from_matched_user(synthesize_user(lc_username)),
+                "skillLevel": "intermediate",
+                "completedMask": 0,
+            }
+        )
+    result = await db.users.insert_many(user_docs)
+    user_ids = [str(user_id) for user_id in result.inserted_ids]
+
+    rng = random.Random(1234)
+    start = datetime.now(timezone.utc)
+    tournament_docs = []
+    memberships: dict[int, set[str]] = {}
+    for t in range(tournaments):
+        members = rng.sample(range(users), min(participants, users))
+        memberships[t] = {user_ids[i] for i in members}
+        tournament_docs.append(
+            {
+                "name": f"bench-t-{t}",
+                "password": "bench",
+                "creatorId": user_ids[members[0]] if members else None,
+                "startTime": start.isoformat(),
+                "endTime": (start + timedelta(days=7)).isoformat(),
+                "participants": [
+                    {
+                        "id": user_ids[i],
+                        "username": user_docs[i]["username"],
+                        "lcUsername": user_docs[i]["lcUsername"],
+                        **{
+                            f"{prefix}{kind}Solved": user_docs[i]["leetcodeProfile"][f"{kind.lower()}Solved"]
+                            for prefix in ("initial", "current")
+                            for kind in ("Total", "Easy", "Medium", "Hard")
+                        },
+                        "score": 0,
+                    }
+                    for i in members
+                ],
+                "streak": 0,
+                "lastChecked": start.date().isoformat(),
+            }
+        )
+    if tournament_docs:
+        await db.tournaments.insert_many(tournament_docs)
+    await client.close()
+
+    #every (user, tournament) pair the user is not already in can be joined exactly once
+    join_pairs = [
+        (user_id, f"bench-t-{t}")
+        for t, members in memberships.items()
+        for user_id in user_ids
+        if user_id not in members
+    ]
+    rng.shuffle(join_pairs)
+    return {"user_ids": user_ids, "join_pairs": join_pairs}
+
+
+def build_scenarios(seeded: dict) -> dict:
+    """
+    Route template -> factory producing the (method, path, json body) for the next request.
+    """
+    user_ids = seeded["user_ids"]
+    join_pairs = iter(seeded["join_pairs"])
+    purchasable = ["bathtub", "candle", "mirror", "rubberduck", "rug", "sink", "speaker"]
+    purchases = iter([(user_id, item) for item in purchasable for user_id in user_ids])
+
+    def pick_user() -> str:
+        return random.choice(user_ids)
+
+    def join():
+        user_id, name = next(join_pairs)
+        return "PUT", "/tournaments/", {"id": user_id, "name": name, "password": "bench"}
+
+    def purchase():
+        user_id, item_id = next(purchases)
+        return "POST", f"/users/{user_id}/room/purchase", {"itemId": item_id}
+
+    def save_room():
+        return (
+            "PUT",
+            f"/users/{pick_user()}/room",
+            {"items": [{"id": "dirtyshower", "owned": True, "placed": True, "x": random.uniform(0, 100), "y": random.uniform(0, 100)}]},
+        )
+
+    def patch_room():
+        #a burst of small moves, like a drag session, so the server-side coalescing gets exercised
+        return (
+            "PATCH",
+            f"/users/{random.choice(user_ids[:10])}/room",
+            {"clientId": "bench", "seq": time.time_ns(), "items": [{"id": "dirtyshower", "x": random.uniform(0, 100), "y": random.uniform(0, 100)}]},
+        )
+
+    return {
+        "GET /tournaments/": lambda: ("GET", f"/tournaments/?userId={pick_user()}", None),
+        "GET /tournaments/?fresh=true": lambda: ("GET", f"/tournaments/?userId={pick_user()}&fresh=true", None),
+        "PUT /tournaments/": join,
+        "GET /users/{id}": lambda: ("GET", f"/users/{pick_user()}", None),
+        "GET /users/{id}/refresh-points": lambda: ("GET", f"/users/{pick_user()}/refresh-points", None),
+        "GET /users/{id}/lessons": lambda: ("GET", f"/users/{pick_user()}/lessons", None),
+        "POST /users/{id}/lessons/{lesson_id}/complete": lambda: ("POST", f"/users/{pick_user()}/lessons/arrays/complete", None),
+        "PUT /users/{id}/room": save_room,
+        "PATCH /users/{id}/room": patch_room,
+        "POST /users/{id}/room/purchase": purchase,
+    }
+
+
+async def run_route(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            try:
+                method, path, body = make_request()
+            except StopIteration:
+                #ran out of unique join/purchase targets for this dataset size
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                key = str(response.status_code)
+            except httpx.HTTPError as exc:
+                key = type(exc).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "elapsedSeconds": round(elapsed, 3),
+        "throughputRps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latencyMs": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args) -> list[subprocess.Popen]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    standin = subprocess.Popen(
+        [
+            sys.executable, "leetcode_standin.py",
+            "--port", str(args.standin_port),
+            "--mode", "synthesize",
+            "--latency", args.upstream_latency,
+        ],
+        cwd=here,
+    )
+    backend_env = {
+        **os.environ,
+        "MONGO_URL": args.mongo_url,
+        "MONGO_DB": args.db,
+        "LEETCODE_GRAPHQL_URL": f"http://127.0.0.1:{args.standin_port}/graphql",
+        #keep background work out of the measurements, the routes are what we are timing
+        "TOURNAMENT_SCHEDULER_ENABLED": "false",
+        "STREAK_EVALUATOR_ENABLED": "false",
+        #the stand-in is local, so by default the upstream limiter is opened wide and the routes
+        #are measured instead of time spent queueing for leetcode tokens
+        "LEETCODE_RATE_PER_SECOND": str(args.upstream_rate),
+        "LEETCODE_RATE_BURST": str(args.upstream_burst),
+    }
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=here,
+        env=backend_env,
+    )
+    return [standin, backend]
+
+
+async def main(args) -> dict:
+    random.seed(args.seed)
+    seeded = await seed(args.mongo_url, args.db, args.users, args.tournaments, args.participants)
+
+    processes: list[subprocess.Popen] = []
+    base_url = args.base_url
+    if base_url is None:
+        processes = start_servers(args)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        if processes:
+            #the backend answers before the stand-in is listening, and early upstream failures
+            #would open the breaker and skew the first route
+            await wait_until_up(f"http://127.0.0.1:{args.standin_port}/stats")
+        await wait_until_up(f"{base_url}/docs")
+        scenarios = build_scenarios(seeded)
+        selected = args.routes or list(scenarios)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        results: dict[str, dict] = {}
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            for route in selected:
+                results[route] = await run_route(client, scenarios[route], args.requests, args.concurrency)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    return {
+        "config": {
+            "users": args.users,
+            "tournaments": args.tournaments,
+            "participants": args.participants,
+            "requestsPerRoute": args.requests,
+            "concurrency": args.concurrency,
+            "upstreamLatency": args.upstream_latency,
+            "upstreamRatePerSecond": args.upstream_rate,
+            "upstreamRateBurst": args.upstream_burst,
+            "seed": args.seed,
+        },
+        "routes": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark for the Leeterboard backend")
+    #deliberately not MONGO_URL, the bench drops its database and should never default to the real cluster
+    parser.add_argument("--mongo-url", default=os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="leeterboard_bench")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tournaments", type=int, default=20)
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--routes", nargs="*", help="only run these route templates")
+    parser.add_argument("--upstream-latency", default="lognormal:3.5,0.5")
+    parser.add_argument("--upstream-rate", type=float, default=100000, help="LEETCODE_RATE_PER_SECOND for the backend")
+    parser.add_argument("--upstream-burst", type=int, default=100000, help="LEETCODE_RATE_BURST for the backend")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--standin-port", type=int, default=8011)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write the json report here instead of stdout")
+    args = parser.parse_args()
+    if args.db == os.getenv("MONGO_DB"):
+        parser.error("--db matches MONGO_DB from your .env, pick a throwaway database name")
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,238 @@
+#local stand-in for the LeetCode GraphQL API so the backend can be run, load tested
+#and benchmarked without touching leetcode.com
+#
+#to run it:
+#python leetcode_standin.py --port 8001
+#
+#then point the backend at it in your .env (next to MONGO_URL):
+#LEETCODE_GRAPHQL_URL=http://localhost:8001/graphql
+#
+#modes:
+#  replay     answer from the fixture file, unknown users get matchedUser: null (default)
+#  synthesize like replay, but unknown users get made-up (deterministic) stats
+#  record     forward every query to the real leetcode and save what comes back into the fixture file
+#
+#latency is a distribution in milliseconds, e.g. "fixed:40", "uniform:20,200", "lognormal:3.5,0.6"
+#errors are a fraction of requests, e.g. --error-rate 0.01 --throttle-rate 0.05
+
+import os
+import re
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+REAL_LEETCODE_GRAPHQL_URL = "https://leetcode.com/graphql"
+DEFAULT_FIXTURES = Path(__file__).with_name("leetcode_fixtures.json")
+
+#matches both `matchedUser(username: $username)` and aliased `u3: matchedUser(username: $u3)`
+MATCHED_USER_FIELD = re.compile(r"(?:(\w+)\s*:\s*)?matchedUser\s*\(\s*username\s*:\s*\$(\w+)\s*\)")
+
+
+class UpstreamError(Exception):
+    """
+    Real leetcode did not give a usable answer in record mode; passed back to the caller as is.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def parse_latency(spec: str):
+    """
+    Turns a latency spec into a function returning a delay in seconds.
+    """
+    kind, _, raw_args = spec.partition(":")
+    args = [float(value) for value in raw_args.split(",") if value]
+    if kind == "fixed":
+        return lambda: args[0] / 1000 if args else 0.0
+    if kind == "uniform":
+        low, high = args
+        return lambda: random.uniform(low, high) / 1000
+    if kind == "lognormal":
+        mu, sigma = args
+        return lambda: random.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def synthesize_user(username: str) -> dict:
+    #seeded from the username so the same user always has the same stats across runs
+    seed = int(hashlib.sha256(username.lower().encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    easy = rng.randint(0, 400)
+    medium = rng.randint(0, 600)
+    hard = rng.randint(0, 150)
+    return build_matched_user(username, easy, medium, hard)
+
+
+def build_matched_user(username: str, easy: int, medium: int, hard: int) -> dict:
+    return {
+        "username": username,
+        "submitStats": {
+            "acSubmissionNum": [
+                {"difficulty": "All", "count": easy + medium + hard},
+                {"difficulty": "Easy", "count": easy},
+                {"difficulty": "Medium", "count": medium},
+                {"difficulty": "Hard", "count": hard},
+            ]
+        },
+    }
+
+
+class FixtureStore:
+    """
+    matchedUser payloads keyed by lowercased username, persisted as one json file.
+    A stored null means "leetcode said this user does not exist".
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.users: dict[str, dict | None] = {}
+        if path.exists():
+            self.users = json.loads(path.read_text())
+
+    def __contains__(self, username: str) -> bool:
+        return username.lower() in self.users
+
+    def get(self, username: str) -> dict | None:
+        return self.users.get(username.lower())
+
+    def put(self, username: str, matched_user: dict | None) -> None:
+        self.users[username.lower()] = matched_user
+
+    def save(self) -> None:
+        self.path.write_text(json.dumps(self.users, indent=2, sort_keys=True))
+
+
+def create_app(
+    fixtures_path: Path = DEFAULT_FIXTURES,
+    mode: str = "replay",
+    latency: str = "fixed:0",
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    upstream_url: str = REAL_LEETCODE_GRAPHQL_URL,
+) -> FastAPI:
+    store = FixtureStore(fixtures_path)
+    next_delay = parse_latency(latency)
+    standin = FastAPI(title="LeetCode GraphQL stand-in")
+    standin.state.stats = {"requests": 0, "users": 0, "errors": 0, "throttled": 0, "recorded": 0}
+    upstream = httpx.AsyncClient(timeout=10) if mode == "record" else None
+
+    async def resolve(username: str) -> dict | None:
+        if mode == "record":
+            try:
+                response = await upstream.post(
+                    upstream_url,
+                    json={
+                        "query": "query getUserProfile($username: String!) { matchedUser(username: $username) "
+                        "{ username submitStats { acSubmissionNum { difficulty count } } } }",
+                        "variables": {"username": username},
+                    },
+                )
+            except httpx.HTTPError as exc:
+                raise UpstreamError(502, f"LeetCode request failed: {type(exc).__name__}")
+            #only a real answer is recorded: a 429/5xx must not end up in the fixtures as
+            #matchedUser: null, which replays as "this user does not exist"
+            if response.status_code != 200:
+                raise UpstreamError(response.status_code, f"LeetCode answered {response.status_code}")
+            try:
+                body = response.json()
+            except ValueError:
+                raise UpstreamError(502, "LeetCode answered with something that is not json")
+            if not isinstance(body, dict) or "data" not in body:
+                raise UpstreamError(502, "LeetCode answered without data")
+            matched = (body["data"] or {}).get("matchedUser")
+            store.put(username, matched)
+            store.save()
+            standin.state.stats["recorded"] += 1
+            return matched
+        if username in store:
+            return store.get(username)
+        if mode == "synthesize":
+            return synthesize_user(username)
+        return None
+
+    @standin.post("/graphql")
+    async def graphql(request: Request):
+        stats = standin.state.stats
+        stats["requests"] += 1
+        await asyncio.sleep(next_delay())
+
+        roll = random.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return JSONResponse(status_code=429, content={"error": "Too many requests"})
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": "Internal server error"})
+
+        body = await request.json()
+        variables = body.get("variables") or {}
+        data: dict = {}
+        for alias, variable in MATCHED_USER_FIELD.findall(body.get("query", "")):
+            username = variables.get(variable)
+            stats["users"] += 1
+            try:
+                data[alias or "matchedUser"] = await resolve(username) if username else None
+            except UpstreamError as exc:
+                stats["errors"] += 1
+                return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+
+        if any(value is None for value in data.values()):
+            #leetcode reports missing users as errors next to the partial data
+            return {"data": data, "errors": [{"message": "That user does not exist."}]}
+        return {"data": data}
+
+    @standin.get("/stats")
+    async def get_stats():
+        return {**standin.state.stats, "mode": mode, "fixtures": len(store.users)}
+
+    return standin
+
+
+def app_from_env() -> FastAPI:
+    return create_app(
+        fixtures_path=Path(os.getenv("LEETCODE_STANDIN_FIXTURES", str(DEFAULT_FIXTURES))),
+        mode=os.getenv("LEETCODE_STANDIN_MODE", "replay"),
+        latency=os.getenv("LEETCODE_STANDIN_LATENCY", "fixed:0"),
+        error_rate=float(os.getenv("LEETCODE_STANDIN_ERROR_RATE", "0")),
+        throttle_rate=float(os.getenv("LEETCODE_STANDIN_THROTTLE_RATE", "0")),
+    )
+
+
+#lets `fastapi dev leetcode_standin.py` pick it up with env based config
+app = app_from_env()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local LeetCode GraphQL stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fixtures", type=Path, default=Path(os.getenv("LEETCODE_STANDIN_FIXTURES", str(DEFAULT_FIXTURES))))
+    parser.add_argument("--mode", choices=["replay", "synthesize", "record"], default=os.getenv("LEETCODE_STANDIN_MODE", "replay"))
+    parser.add_argument("--latency", default=os.getenv("LEETCODE_STANDIN_LATENCY", "fixed:0"))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("LEETCODE_STANDIN_ERROR_RATE", "0")))
+    parser.add_argument("--throttle-rate", type=float, default=float(os.getenv("LEETCODE_STANDIN_THROTTLE_RATE", "0")))
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            fixtures_path=args.fixtures,
+            mode=args.mode,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+        ),
+        host=args.host,
+        port=args.port,
+    )
@@ -1,6 +1,8 @@
 #you will need to install the following packages (IN .venv NOT YOUR GLOBAL ENVIRONMENT):
-#pip install requests
+#pip install httpx
 #pip install pymongo
+#pip install orjson
+#pip install pillow (optional, only needed for avatar thumbnails)
 #pip install "fastapi[standard]"
 
 #to run the backend server you will need to run:
@@ -9,16 +11,30 @@
 #then click the localhost url it spits out to checkout the Swagger UI backend (sorta like view the React pages)
 
 import os
+import time
+import typing
+import base64
+import random
+import hashlib
+import binascii
+import asyncio
+import logging
+import functools
+from urllib.parse import parse_qs
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Literal
 
 #for leetcode graphql
-import requests
+import httpx
 from datetime import datetime, timedelta, timezone
 
 
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import Response
+from fastapi import FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+import orjson
 from pydantic import ConfigDict, BaseModel, Field, EmailStr
 from pydantic.functional_validators import BeforeValidator
 
@@ -29,22 +45,164 @@ from typing_extensions import Annotated
 
 #mongodb stuff
 from bson import ObjectId
+from bson.errors import InvalidId
 from pymongo import AsyncMongoClient
 from pymongo import ReturnDocument
+from pymongo import UpdateOne
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL")
 MONGO_DB = os.getenv("MONGO_DB")
+#point this at the local stand-in (python leetcode_standin.py) to work offline
+LEETCODE_GRAPHQL_URL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+
+logger = logging.getLogger("leeterboard")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await leetcode_client.start()
+    await index_manager.ensure()
+    await index_manager.check_query_plans()
+    await points_leaderboard.rebuild()
+    tournament_scheduler.start()
+    streak_evaluator.start()
+    avatar_migration = asyncio.create_task(migrate_inline_avatars())
+    schema_migration = asyncio.create_task(user_migration.run())
+    try:
+        yield
+    finally:
+        avatar_migration.cancel()
+        schema_migration.cancel()
+        await room_patch_coalescer.close()
+        await tournament_scheduler.stop()
+        await streak_evaluator.stop()
+        await leetcode_client.close()
+
 
-app = FastAPI()
+#orjson renders every response; the hot read routes also skip response_model validation (see render_trusted)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 #mongodb strings imported from .env file check out google doc for the contents of what your .env is supposed to look like
 client = AsyncMongoClient(MONGO_URL)
 db = client[MONGO_DB]
 users_collection = db.get_collection("users")
 tournaments_collection = db.get_collection("tournaments")
+#checkpoints for resumable data migrations, one document per migration
+migrations_collection = db.get_collection("migrations")
+
+
+class MongoIndexManager:
+    """
+    Declares the indexes the hot queries rely on and creates any that are missing at startup.
+    create_indexes is a no-op for indexes that already exist, so this is safe on every boot.
+    Known query shapes are explained afterwards and any that would still scan the whole
+    collection get logged.
+    """
+
+    def __init__(self):
+        self.indexes: list[tuple] = []
+        self.queries: list[tuple] = []
+
+    def declare(self, collection, *indexes: IndexModel) -> None:
+        self.indexes.append((collection, list(indexes)))
+
+    def known_query(self, description: str, collection, filter: dict, sort: dict | None = None) -> None:
+        self.queries.append((description, collection, filter, sort))
+
+    async def ensure(self) -> None:
+        for collection, indexes in self.indexes:
+            for index in indexes:
+                try:
+                    await collection.create_indexes([index])
+                except OperationFailure as exc:
+                    #usually existing duplicates blocking a unique index, or an index with the same
+                    #name but different options; keep booting and let someone clean the data up
+                    logger.warning(
+                        "Could not create index %s on %s: %s",
+                        index.document["name"],
+                        collection.name,
+                        exc,
+                    )
+
+    async def check_query_plans(self) -> list[str]:
+        scans: list[str] = []
+        for description, collection, filter, sort in self.queries:
+            command: dict = {"find": collection.name, "filter": filter}
+            if sort:
+                command["sort"] = sort
+            try:
+                explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            except OperationFailure as exc:
+                logger.warning("Could not explain %s: %s", description, exc)
+                continue
+            if plan_has_stage(explained.get("queryPlanner", {}).get("winningPlan", {}), "COLLSCAN"):
+                scans.append(description)
+                logger.warning("Query would fall back to a collection scan: %s", description)
+        return scans
+
+
+def plan_has_stage(plan: dict, stage: str) -> bool:
+    if plan.get("stage") == stage:
+        return True
+    children = [plan.get("inputStage")] + list(plan.get("inputStages", []))
+    #newer servers wrap the classic plan in queryPlan
+    children.append(plan.get("queryPlan"))
+    return any(plan_has_stage(child, stage) for child in children if child)
+
+
+index_manager = MongoIndexManager()
+index_manager.declare(
+    users_collection,
+    #login and register both look users up by email, register also by username;
+    #register_user already refuses duplicates so both can be unique
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    IndexModel([("points", ASCENDING)], name="points"),
+)
+index_manager.declare(
+    tournaments_collection,
+    #create_tournament refuses duplicate names
+    IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    IndexModel([("name", ASCENDING), ("password", ASCENDING)], name="name_password"),
+    IndexModel([("participants.id", ASCENDING), ("_id", ASCENDING)], name="participants_id"),
+    IndexModel([("endTime", ASCENDING)], name="end_time"),
+    #the refresh scheduler only walks tournaments that have not had their final refresh
+    IndexModel([("finalized", ASCENDING), ("_id", ASCENDING)], name="finalized"),
+)
+index_manager.known_query("login: users by email", users_collection, {"email": "x"})
+index_manager.known_query(
+    "register: users by email or username",
+    users_collection,
+    {"$or": [{"email": "x"}, {"username": "x"}]},
+)
+index_manager.known_query("create tournament: by name", tournaments_collection, {"name": "x"})
+index_manager.known_query(
+    "join tournament: by name + password", tournaments_collection, {"name": "x", "password": "x"}
+)
+index_manager.known_query(
+    "list tournaments: by participant",
+    tournaments_collection,
+    {"participants.id": "x"},
+    {"_id": -1},
+)
+index_manager.known_query(
+    "list tournaments: active", tournaments_collection, {"endTime": {"$gt": "x"}}
+)
+index_manager.known_query(
+    "streak evaluator: due tournaments",
+    tournaments_collection,
+    {"lastChecked": {"$ne": "x"}, "endTime": {"$gt": "x"}},
+)
+index_manager.known_query(
+    "refresh scheduler: unfinalized tournaments", tournaments_collection, {"finalized": {"$ne": True}}
+)
 
 #this allows comms between frontend and backend
 origins = [
@@ -57,8 +215,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+#tournament lists and full user documents get big, compress anything above this many bytes
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "4096"))
+
+
+class StreamAwareGZipMiddleware:
+    """
+    GZipMiddleware for everything except `stream=true` requests: gzip holds output back until
+    its zlib buffer fills, which would delay the ndjson lines the stream exists to send early.
+    """
+
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    @staticmethod
+    def is_stream_request(scope) -> bool:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        #same spellings fastapi accepts for a true bool query parameter
+        return any(value.lower() in ("1", "true", "on", "yes") for value in query.get("stream", []))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.is_stream_request(scope):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
+
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=RESPONSE_GZIP_MIN_BYTES)
+
 PyObjectId = Annotated[str, BeforeValidator(str)]
 SkillLevel = Literal["beginner", "intermediate", "advanced"]
 
@@ -76,6 +264,8 @@ class UserModel(BaseModel):
     skillLevel: SkillLevel | None = None
     completedLessons: list[str] = Field(default_factory=list)
     roomItems: list["RoomItemModel"] = Field(default_factory=list)
+    #true when leetcodeProfile is the stored copy because leetcode could not be reached
+    stale: bool = False
     model_config = ConfigDict(
         populate_by_name=True,
     )
@@ -123,18 +313,58 @@ class RoomItemModel(BaseModel):
 class RoomItemsPayload(BaseModel):
     items: list[RoomItemModel]
 
+class RoomPatchItem(BaseModel):
+    id: str
+    placed: bool | None = None
+    x: float | None = Field(default=None, ge=0, le=100)
+    y: float | None = Field(default=None, ge=0, le=100)
+
+class RoomPatchPayload(BaseModel):
+    #one id per open tab/page; seq only has to increase within that client, so clocks and
+    #other tabs never matter, and an older patch from the same client never overwrites a newer one
+    clientId: str = Field(..., pattern=r"^[A-Za-z0-9_-]{1,64}$")
+    seq: int = Field(..., ge=0)
+    items: list[RoomPatchItem]
+
+class RoomPatchResponse(BaseModel):
+    seq: int
+    applied: bool
+    roomItems: list[RoomItemModel]
+
 class RoomPurchaseRequest(BaseModel):
     itemId: str
 
 class SkillLevelRequest(BaseModel):
     skillLevel: SkillLevel
 
+class WalletResponse(BaseModel):
+    points: int
+    streakSaves: int
+    pointsDelta: int
+    streakSavesDelta: int
+
+class SkillLevelResponse(BaseModel):
+    skillLevel: SkillLevel
+    completedLessons: list[str]
+
 class LessonCompleteResponse(BaseModel):
     skillLevel: SkillLevel
     lessons: list[dict]
     points: int
     pointsAwarded: int
 
+class LeaderboardEntry(BaseModel):
+    id: str
+    username: str | None = None
+    points: int
+    rank: int
+
+class LeaderboardPosition(BaseModel):
+    rank: int
+    points: int
+    totalUsers: int
+    entries: list[LeaderboardEntry]
+
 UserModel.model_rebuild()
 
 class TournamentParticipant(BaseModel):
@@ -143,12 +373,13 @@ class TournamentParticipant(BaseModel):
     lcUsername: str | None = None
     initialTotalSolved: int
     currentTotalSolved: int
-    initialEasySolved: int
-    currentEasySolved: int
-    initialMediumSolved: int
-    currentMediumSolved: int
-    initialHardSolved: int
-    currentHardSolved: int
+    #the per-difficulty breakdown is left out of the summary view of GET /tournaments/
+    initialEasySolved: int | None = None
+    currentEasySolved: int | None = None
+    initialMediumSolved: int | None = None
+    currentMediumSolved: int | None = None
+    initialHardSolved: int | None = None
+    currentHardSolved: int | None = None
     score: int
 
 class TournamentModel(BaseModel):
@@ -161,11 +392,71 @@ class TournamentModel(BaseModel):
     participants: list[TournamentParticipant] = []
     streak: int = Field(default=0)
     lastChecked: str | None = None
+    lastRefreshed: str | None = None
+    stale: bool = False
 
     model_config = ConfigDict(
         populate_by_name=True,
     )
 
+#fast response path: documents we wrote ourselves do not need re-validating, they only need
+#the same shape response_model would give them (model fields only, by field name, defaults filled in)
+RESPONSE_FIELDS: dict[type, list[tuple]] = {}
+
+
+def response_fields(model: type[BaseModel]) -> list[tuple]:
+    fields = RESPONSE_FIELDS.get(model)
+    if fields is None:
+        fields = []
+        for name, field in model.model_fields.items():
+            nested = None
+            args = typing.get_args(field.annotation)
+            if typing.get_origin(field.annotation) is list and args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+                nested = args[0]
+            fields.append((name, field.alias or name, field, nested))
+        RESPONSE_FIELDS[model] = fields
+    return fields
+
+
+def project_trusted(model: type[BaseModel], document: dict) -> dict:
+    projected: dict = {}
+    for name, source, field, nested in response_fields(model):
+        if source in document:
+            value = document[source]
+        elif name in document:
+            value = document[name]
+        elif field.is_required():
+            value = None
+        else:
+            value = field.get_default(call_default_factory=True)
+        if nested is not None and value is not None:
+            value = [project_trusted(nested, item) for item in value]
+        projected[name] = value
+    return projected
+
+
+def render_trusted(
+    model: type[BaseModel],
+    content: dict | list[dict],
+    response: Response | None = None,
+    status_code: int = 200,
+) -> ORJSONResponse:
+    """
+    Renders trusted documents straight to orjson, skipping response_model validation.
+    Headers already set on the endpoint's injected `response` are carried over.
+    """
+    if isinstance(content, list):
+        body = [project_trusted(model, item) for item in content]
+    else:
+        body = project_trusted(model, content)
+    headers = (
+        {key: value for key, value in response.headers.items() if key != "content-length"}
+        if response is not None
+        else None
+    )
+    return ORJSONResponse(body, status_code=status_code, headers=headers)
+
+
 class CreateTournamentRequest(BaseModel):
     name: str = Field(..., min_length=1)
     password: str = Field(..., min_length=1)
@@ -177,8 +468,7 @@ class JoinTournamentRequest(BaseModel):
     name: str
     password: str
 
-#this is how we get user data from leetcode
-LEETCODE_GRAPHQL_URL = "https://leetcode.com/graphql"
+#this is how we get user data from leetcode (LEETCODE_GRAPHQL_URL is set next to MONGO_URL)
 
 LEETCODE_QUERY = """
 query getUserProfile($username: String!) {
@@ -194,6 +484,404 @@ query getUserProfile($username: String!) {
 }
 """
 
+LEETCODE_PROFILE_FIELDS = """
+    username
+    submitStats {
+      acSubmissionNum {
+        difficulty
+        count
+      }
+    }
+"""
+
+#how many aliased matchedUser lookups go into one graphql document
+LEETCODE_BATCH_SIZE = int(os.getenv("LEETCODE_BATCH_SIZE", "10"))
+
+
+def build_batched_profile_query(count: int) -> str:
+    """
+    Builds one GraphQL document with `count` aliased matchedUser fields (u0, u1, ...),
+    each bound to its own $uN variable.
+    """
+    variables = ", ".join(f"$u{i}: String!" for i in range(count))
+    fields = "\n".join(
+        f"  u{i}: matchedUser(username: $u{i}) {{{LEETCODE_PROFILE_FIELDS}  }}" for i in range(count)
+    )
+    return f"query getUserProfiles({variables}) {{\n{fields}\n}}"
+
+LEETCODE_RATE_PER_SECOND = float(os.getenv("LEETCODE_RATE_PER_SECOND", "5"))
+LEETCODE_RATE_BURST = int(os.getenv("LEETCODE_RATE_BURST", "10"))
+LEETCODE_RATE_MAX_WAIT_SECONDS = float(os.getenv("LEETCODE_RATE_MAX_WAIT_SECONDS", "2"))
+#background jobs (refresh scheduler, streak evaluator) queue for tokens instead of failing fast,
+#with only a few batches in flight so they never reserve the bucket far ahead of request traffic
+LEETCODE_BACKGROUND_MAX_WAIT_SECONDS = float(os.getenv("LEETCODE_BACKGROUND_MAX_WAIT_SECONDS", "300"))
+LEETCODE_BACKGROUND_BATCHES_IN_FLIGHT = int(os.getenv("LEETCODE_BACKGROUND_BATCHES_IN_FLIGHT", "2"))
+LEETCODE_BREAKER_FAILURES = int(os.getenv("LEETCODE_BREAKER_FAILURES", "5"))
+LEETCODE_BREAKER_RESET_SECONDS = float(os.getenv("LEETCODE_BREAKER_RESET_SECONDS", "30"))
+
+
+LEETCODE_UNAVAILABLE_DETAIL = "LeetCode is not responding right now. Please try again in a minute."
+
+
+class LeetCodeUnavailable(Exception):
+    """
+    Raised when LeetCode could not be asked at all (circuit open, rate limited, timeout, 429/5xx).
+    Different from a lookup that succeeded and found no such user, which is None.
+    """
+
+
+class TokenBucket:
+    """
+    Shared token-bucket limiter for upstream calls: `rate` tokens per second, up to `capacity` banked.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self.throttled = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """
+        Takes one token, waiting at most `max_wait` seconds for it. Returns False if it would wait longer.
+        """
+        #reserve the token up front: the balance goes negative by one per queued caller, so each
+        #caller's wait is the time until its own slot refills. there is no await between the
+        #check and the reservation, so no lock is needed and nobody sleeps on behalf of others
+        self._refill()
+        wait = 0.0
+        if self._tokens < 1:
+            wait = (1 - self._tokens) / self.rate if self.rate > 0 else float("inf")
+            if wait > max_wait:
+                self.throttled += 1
+                return False
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and rejects calls for
+    `reset_seconds`, then lets a single probe through (half-open) before closing again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release_probe(self) -> None:
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("LeetCode circuit opened after %s failures", self.consecutive_failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "resetSeconds": self.reset_seconds,
+        }
+
+LEETCODE_TIMEOUT_SECONDS = float(os.getenv("LEETCODE_TIMEOUT_SECONDS", "10"))
+LEETCODE_MAX_CONNECTIONS = int(os.getenv("LEETCODE_MAX_CONNECTIONS", "100"))
+LEETCODE_MAX_KEEPALIVE = int(os.getenv("LEETCODE_MAX_KEEPALIVE", "20"))
+
+
+class LeetCodeClient:
+    """
+    Shared asyncio client for the LeetCode GraphQL API.
+    One keep-alive connection pool is opened at startup and reused by every request,
+    so upstream calls never block the event loop.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = LEETCODE_TIMEOUT_SECONDS,
+        max_connections: int = LEETCODE_MAX_CONNECTIONS,
+        max_keepalive: int = LEETCODE_MAX_KEEPALIVE,
+        rate_limiter: TokenBucket | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.rate_limiter = rate_limiter or TokenBucket(LEETCODE_RATE_PER_SECOND, LEETCODE_RATE_BURST)
+        self.breaker = breaker or CircuitBreaker(LEETCODE_BREAKER_FAILURES, LEETCODE_BREAKER_RESET_SECONDS)
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            #http/2 needs the optional h2 package, plain keep-alive works fine without it
+            http2 = False
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def query(
+        self,
+        query: str,
+        variables: dict,
+        timeout: float | None = None,
+        max_wait: float = LEETCODE_RATE_MAX_WAIT_SECONDS,
+    ) -> dict:
+        """
+        Runs a GraphQL query and returns the decoded body.
+        Raises LeetCodeUnavailable when the circuit is open, no token frees up within `max_wait`
+        or the upstream call fails, so callers can fall back to stored data.
+        """
+        if self._client is None:
+            #handlers can run without the lifespan (tests, scripts), open the pool lazily
+            await self.start()
+
+        if not self.breaker.allow():
+            raise LeetCodeUnavailable("circuit open")
+        #only the half-open probe gets past allow() while the breaker is not closed
+        probe = self.breaker.state == "half_open"
+        try:
+            if not await self.rate_limiter.acquire(max_wait):
+                #we never asked upstream, so this does not count against the breaker
+                raise LeetCodeUnavailable("rate limited")
+
+            try:
+                response = await self._client.post(
+                    self.url,
+                    json={"query": query, "variables": variables},
+                    timeout=timeout if timeout is not None else self.timeout,
+                )
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise LeetCodeUnavailable(f"upstream returned {response.status_code}")
+                data = response.json()
+            except (httpx.HTTPError, ValueError, LeetCodeUnavailable) as exc:
+                logger.warning("LeetCode request failed: %r", exc)
+                self.breaker.record_failure()
+                raise LeetCodeUnavailable(str(exc)) from exc
+
+            self.breaker.record_success()
+            return data
+        finally:
+            #a cancelled or otherwise aborted probe must not leave the breaker stuck half-open
+            if probe:
+                self.breaker.release_probe()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "rateLimiter": {
+                "ratePerSecond": self.rate_limiter.rate,
+                "burst": self.rate_limiter.capacity,
+                "throttled": self.rate_limiter.throttled,
+            },
+        }
+
+
+leetcode_client = LeetCodeClient(LEETCODE_GRAPHQL_URL)
+
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "30"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "5000"))
+
+
+class ProfileCache:
+    """
+    TTL + LRU cache of LeetCode profiles keyed by lcUsername.
+    Concurrent misses for the same username share a single upstream request (single-flight).
+    Failed lookups (None) are not cached so the next caller retries.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(username: str) -> str:
+        #leetcode usernames are case-insensitive
+        return username.strip().lower()
+
+    def get(self, username: str) -> dict | None:
+        key = self.key_for(username)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return profile
+
+    def set(self, username: str, profile: dict) -> None:
+        key = self.key_for(username)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, profile)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, username: str, fetcher) -> dict | None:
+        cached = self.get(username)
+        if cached is not None:
+            self.hits += 1
+            return dict(cached)
+
+        key = self.key_for(username)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetcher(username))
+            self._inflight[key] = task
+
+            def _finish(done: asyncio.Task) -> None:
+                self._inflight.pop(key, None)
+                if not done.cancelled() and done.exception() is None and done.result() is not None:
+                    self.set(username, done.result())
+
+            task.add_done_callback(_finish)
+
+        #shield so one cancelled caller does not cancel the fetch for everyone else waiting on it
+        profile = await asyncio.shield(task)
+        return dict(profile) if profile is not None else None
+
+    async def get_or_fetch_many(self, usernames: list[str], batch_fetcher) -> dict[str, dict | None]:
+        """
+        Like get_or_fetch for many usernames at once. Cached and in-flight usernames are reused,
+        everything else is handed to batch_fetcher in a single call.
+        Returns a dict keyed by the usernames as passed in; usernames LeetCode could not be
+        asked about are missing from it.
+        """
+        waiting: dict[str, asyncio.Task | None] = {}
+        results: dict[str, dict | None] = {}
+        missing: list[str] = []
+        #tasks started below by cache key, so case variants of a missing name share its outcome
+        started: dict[str, asyncio.Task] = {}
+
+        for username in dict.fromkeys(usernames):
+            key = self.key_for(username)
+            cached = self.get(username)
+            if cached is not None:
+                self.hits += 1
+                results[username] = dict(cached)
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[username] = self._inflight[key]
+            elif key in (self.key_for(name) for name in missing):
+                waiting[username] = None  # resolved from the batch below
+            else:
+                self.misses += 1
+                missing.append(username)
+
+        if missing:
+            batch_task = asyncio.ensure_future(batch_fetcher(missing))
+
+            async def pick(name: str):
+                fetched = await asyncio.shield(batch_task)
+                if name not in fetched:
+                    raise LeetCodeUnavailable(f"no result for {name}")
+                return fetched[name]
+
+            for username in missing:
+                key = self.key_for(username)
+                task = asyncio.ensure_future(pick(username))
+                self._inflight[key] = task
+
+                def _finish(done: asyncio.Task, key=key, username=username) -> None:
+                    self._inflight.pop(key, None)
+                    if not done.cancelled() and done.exception() is None and done.result() is not None:
+                        self.set(username, done.result())
+
+                task.add_done_callback(_finish)
+                started[key] = task
+                waiting[username] = task
+
+        for username, task in waiting.items():
+            if task is None:
+                task = started[self.key_for(username)]
+            try:
+                profile = await asyncio.shield(task)
+            except LeetCodeUnavailable:
+                #left out of the results so callers can tell "unavailable" from "no such user"
+                continue
+            results[username] = dict(profile) if profile is not None else None
+
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "hitRate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+profile_cache = ProfileCache(PROFILE_CACHE_TTL_SECONDS, PROFILE_CACHE_MAX_ENTRIES)
+
 POINT_VALUES = {
     "easy": 10,
     "medium": 20,
@@ -436,28 +1124,333 @@ def clamp_percent(value: float) -> float:
     return max(0.0, min(100.0, float(value)))
 
 
-def get_lesson_track(skill_level: SkillLevel | None) -> list[dict]:
-    if skill_level in LESSON_TRACKS:
-        return LESSON_TRACKS[skill_level]  # type: ignore[index]
-    return LESSON_TRACKS["intermediate"]
+#compact stored room: {"v": version, "owned": bits, "placed": bits, "xy": [x0, y0, x1, y1, ...]}
+#bit i and xy[2i], xy[2i+1] belong to ROOM_SLOTS[i]; coordinates are hundredths of a percent.
+#slots are catalog positions, so only ever append to ROOM_CATALOG and bump ROOM_SCHEMA_VERSION
+#when you do: older documents get the new slots filled with catalog defaults on decode and are
+#rewritten at the current version the next time their room is written (or by the migration)
+ROOM_SCHEMA_VERSION = 1
+ROOM_SLOTS: tuple[str, ...] = tuple(ROOM_CATALOG)
+ROOM_POSITIONS: dict[str, int] = {item_id: position for position, item_id in enumerate(ROOM_SLOTS)}
+ROOM_FULL_MASK = (1 << len(ROOM_SLOTS)) - 1
+ROOM_COORD_SCALE = 100
+USER_FIELDS_ROOM = {"room": 1, "roomItems": 1}
 
 
-def build_lesson_progress(
-    user: dict,
-) -> dict:
-    skill_level: SkillLevel | None = user.get("skillLevel")  # type: ignore[assignment]
-    completed = set(user.get("completedLessons") or [])
-    track = get_lesson_track(skill_level)
-    lessons: list[dict] = []
-    found_current = False
+def pack_percent(value: float) -> int:
+    return round(clamp_percent(value) * ROOM_COORD_SCALE)
+
+
+def encode_room(room_items: list[dict]) -> dict:
+    """
+    Packs normalized room items (catalog order, see normalize_room_items) into the stored form.
+    """
+    owned = placed = 0
+    xy: list[int] = []
+    for position, item in enumerate(room_items):
+        if item["owned"]:
+            owned |= 1 << position
+        if item["placed"]:
+            placed |= 1 << position
+        xy.append(pack_percent(item["x"]))
+        xy.append(pack_percent(item["y"]))
+    return {"v": ROOM_SCHEMA_VERSION, "owned": owned, "placed": placed, "xy": xy}
+
+
+def decode_room(room: dict) -> list[dict]:
+    owned = int(room.get("owned", 0))
+    placed = int(room.get("placed", 0))
+    xy = room.get("xy") or []
+    items: list[dict] = []
+    for position, item_id in enumerate(ROOM_SLOTS):
+        if 2 * position + 1 < len(xy):
+            items.append(
+                {
+                    "id": item_id,
+                    "owned": bool(owned >> position & 1),
+                    "placed": bool(placed >> position & 1),
+                    "x": xy[2 * position] / ROOM_COORD_SCALE,
+                    "y": xy[2 * position + 1] / ROOM_COORD_SCALE,
+                }
+            )
+        else:
+            #slot added to the catalog after this room was stored
+            meta = ROOM_CATALOG[item_id]
+            owned_default = bool(meta.get("default_owned", False))
+            items.append(
+                {
+                    "id": item_id,
+                    "owned": owned_default,
+                    "placed": owned_default,
+                    "x": clamp_percent(meta.get("x", 50.0)),
+                    "y": clamp_percent(meta.get("y", 50.0)),
+                }
+            )
+    return items
+
+
+def room_items_for(user: dict) -> list[dict]:
+    """
+    The user's room as RoomItemModel dicts, from the compact form or the legacy roomItems list.
+    """
+    room = user.get("room")
+    if room:
+        return decode_room(room)
+    return normalize_room_items(user.get("roomItems"))
+
+
+def room_is_current(user: dict) -> bool:
+    return (user.get("room") or {}).get("v") == ROOM_SCHEMA_VERSION
+
+
+async def load_room(user_id: str | ObjectId, fields: dict | None = None) -> dict | None:
+    """
+    Reads the user's room (plus `fields`), first rewriting a legacy roomItems list or an
+    older room version into the current compact form so positional updates line up.
+    """
+    user = await find_user(user_id, {**(fields or {}), **USER_FIELDS_ROOM})
+    if user is None or room_is_current(user):
+        return user
+    room = encode_room(room_items_for(user))
+    #only the first concurrent upgrade wins, later ones would overwrite writes made on top of it
+    await users_collection.update_one(
+        {"_id": user["_id"], "room.v": {"$ne": ROOM_SCHEMA_VERSION}},
+        bump_version({"$set": {"room": room}, "$unset": {"roomItems": ""}}),
+    )
+    return await find_user(user_id, {**(fields or {}), **USER_FIELDS_ROOM})
+
 
-    for lesson in track:
+def room_layout_update(room: dict, changes: dict[int, dict]) -> dict:
+    """
+    Positional update for `changes` (catalog position -> any of placed/x/y).
+    Items the user does not own are ignored, and only the touched placed bits and
+    coordinate slots are written.
+    """
+    owned = int(room.get("owned", 0))
+    xy = room.get("xy") or []
+    touched = placed = 0
+    coordinates: dict[str, int] = {}
+    for position, change in changes.items():
+        if not owned >> position & 1:
+            continue
+        bit = 1 << position
+        if change.get("placed") is not None:
+            touched |= bit
+            if change["placed"]:
+                placed |= bit
+        for offset, key in ((0, "x"), (1, "y")):
+            index = 2 * position + offset
+            value = change.get(key)
+            if value is not None and (index >= len(xy) or xy[index] != pack_percent(value)):
+                coordinates[f"room.xy.{index}"] = pack_percent(value)
+
+    update: dict = {}
+    if touched:
+        update["$bit"] = {"room.placed": {"and": ROOM_FULL_MASK & ~touched, "or": placed}}
+    if coordinates:
+        update["$set"] = coordinates
+    return update
+
+
+#clients remembered per room for seq ordering, the least recently seen are dropped beyond this
+ROOM_PATCH_MAX_CLIENTS = int(os.getenv("ROOM_PATCH_MAX_CLIENTS", "8"))
+
+
+async def apply_room_patch(user_id: str, client_id: str, seq: int, changes: dict[int, dict]) -> dict | None:
+    """
+    Writes one (possibly coalesced) room patch unless the same client already wrote a newer seq.
+    Seqs are tracked per client in room.clients, patches from different clients never block each other.
+    Returns the RoomPatchResponse payload, or None if the user does not exist.
+    """
+    user = await load_room(user_id, USER_FIELDS_ID)
+    if user is None:
+        return None
+    update = room_layout_update(user["room"], changes)
+    clients: dict = user["room"].get("clients") or {}
+    update["$set"] = {
+        **update.get("$set", {}),
+        f"room.clients.{client_id}": {"seq": seq, "at": int(time.time() * 1000)},
+    }
+    others = sorted((int(entry.get("at", 0)), other) for other, entry in clients.items() if other != client_id)
+    stale_clients = others[: max(0, len(others) - ROOM_PATCH_MAX_CLIENTS + 1)]
+    if stale_clients:
+        update["$unset"] = {f"room.clients.{other}": "" for _, other in stale_clients}
+    seq_field = f"room.clients.{client_id}.seq"
+    updated = await update_user_document(
+        user_id,
+        update,
+        fields=USER_FIELDS_ROOM,
+        conditions={"$or": [{seq_field: {"$lt": seq}}, {seq_field: {"$exists": False}}]},
+    )
+    if updated is not None:
+        return {"seq": seq, "applied": True, "roomItems": decode_room(updated["room"])}
+
+    #this client already wrote a newer patch (another worker's batch got there first)
+    current = await find_user(user_id, USER_FIELDS_ROOM)
+    if current is None:
+        return None
+    stored = ((current.get("room") or {}).get("clients") or {}).get(client_id) or {}
+    return {
+        "seq": int(stored.get("seq", 0)),
+        "applied": False,
+        "roomItems": room_items_for(current),
+    }
+
+
+#a drag sends a patch per pointer move, anything arriving this soon after the first one shares its write
+ROOM_PATCH_COALESCE_MS = float(os.getenv("ROOM_PATCH_COALESCE_MS", "150"))
+
+
+class RoomPatchCoalescer:
+    """
+    Collects room patches per (user, client) for `window` seconds after the first one, then writes
+    them as a single apply_room_patch. Per item, the patch with the higher seq wins; every caller
+    in the batch gets the same result.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._batches: dict[tuple[str, str], dict] = {}
+        self.patches = 0
+        self.writes = 0
+
+    async def submit(self, user_id: str, client_id: str, seq: int, changes: dict[int, dict]) -> dict | None:
+        self.patches += 1
+        key = (user_id, client_id)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = {"seq": seq, "changes": {}, "seqs": {}}
+            batch["task"] = asyncio.ensure_future(self._flush(key, batch))
+            self._batches[key] = batch
+
+        batch["seq"] = max(batch["seq"], seq)
+        for position, change in changes.items():
+            merged = batch["changes"].setdefault(position, {})
+            if seq >= batch["seqs"].get(position, -1):
+                merged.update(change)
+                batch["seqs"][position] = seq
+            else:
+                #arrived late: only fill in fields the newer patch did not set
+                for field, value in change.items():
+                    merged.setdefault(field, value)
+
+        #shield so one client hanging up does not cancel the write for the rest of the batch
+        return await asyncio.shield(batch["task"])
+
+    async def _flush(self, key: tuple[str, str], batch: dict) -> dict | None:
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            #anything submitted from here on starts the next batch
+            if self._batches.get(key) is batch:
+                del self._batches[key]
+        self.writes += 1
+        user_id, client_id = key
+        return await apply_room_patch(user_id, client_id, batch["seq"], batch["changes"])
+
+    async def close(self) -> None:
+        #let batches that are still waiting out their window land before shutdown
+        tasks = [batch["task"] for batch in self._batches.values()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "windowMs": self.window * 1000,
+            "patches": self.patches,
+            "writes": self.writes,
+            "pending": len(self._batches),
+        }
+
+
+room_patch_coalescer = RoomPatchCoalescer(ROOM_PATCH_COALESCE_MS / 1000)
+
+
+class LessonTable:
+    """
+    Read-only view of one lesson track: lessons in order, their positions and the
+    bit each position owns in a user's completedMask.
+    """
+
+    __slots__ = ("skill_level", "ids", "positions", "full_mask")
+
+    def __init__(self, skill_level: SkillLevel, lessons: list[dict]):
+        self.skill_level = skill_level
+        self.ids: tuple[str, ...] = tuple(lesson["id"] for lesson in lessons)
+        self.positions: dict[str, int] = {lesson_id: position for position, lesson_id in enumerate(self.ids)}
+        self.full_mask = (1 << len(self.ids)) - 1
+
+    def mask_for(self, lesson_ids) -> int:
+        mask = 0
+        for lesson_id in lesson_ids:
+            position = self.positions.get(lesson_id)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def ids_for(self, mask: int) -> list[str]:
+        return [lesson_id for position, lesson_id in enumerate(self.ids) if mask >> position & 1]
+
+
+#built once at import, positions are the order of LESSON_TRACKS so only ever append new lessons to a track
+LESSON_TABLES: dict[SkillLevel, LessonTable] = {
+    level: LessonTable(level, lessons) for level, lessons in LESSON_TRACKS.items()
+}
+
+
+def get_lesson_table(skill_level: SkillLevel | None) -> LessonTable:
+    return LESSON_TABLES.get(skill_level, LESSON_TABLES["intermediate"])  # type: ignore[arg-type]
+
+
+def lesson_positions(lesson_id: str) -> dict[int, list[SkillLevel | None]]:
+    """
+    Position of `lesson_id` -> stored skillLevel values whose track has it there.
+    None stands for users without a (valid) level, who get the intermediate track.
+    """
+    positions: dict[int, list[SkillLevel | None]] = {}
+    for level, table in LESSON_TABLES.items():
+        position = table.positions.get(lesson_id)
+        if position is None:
+            continue
+        levels = positions.setdefault(position, [])
+        levels.append(level)
+        if level == "intermediate":
+            levels.append(None)
+    return positions
+
+
+def completed_lesson_mask(user: dict) -> int:
+    """
+    Bitmask of the user's completed lessons on their current track.
+    Documents written before completedMask existed only have the completedLessons list,
+    both are read so nothing is lost until the migration folds the list into the mask.
+    """
+    table = get_lesson_table(user.get("skillLevel"))
+    mask = int(user.get("completedMask") or 0)
+    legacy = user.get("completedLessons")
+    if legacy:
+        mask |= table.mask_for(legacy)
+    return mask & table.full_mask
+
+
+def completed_lesson_ids(user: dict) -> list[str]:
+    return get_lesson_table(user.get("skillLevel")).ids_for(completed_lesson_mask(user))
+
+
+@functools.lru_cache(maxsize=1024)
+def render_lesson_progress(skill_level: SkillLevel | None, mask: int) -> dict:
+    #memoized per (track, mask), a track of n lessons only has 2^n distinct payloads.
+    #callers share the returned dict, so copy it before changing anything
+    table = get_lesson_table(skill_level)
+    current = next((position for position in range(len(table.ids)) if not mask >> position & 1), len(table.ids) - 1)
+    lessons: list[dict] = []
+    for position, lesson in enumerate(LESSON_TRACKS[table.skill_level]):
         status = "locked"
-        if lesson["id"] in completed:
-            status = "done"
-        elif not found_current:
+        if position == current:
+            #when every lesson is done the last one stays current to avoid empty states
             status = "current"
-            found_current = True
+        elif mask >> position & 1:
+            status = "done"
         lessons.append(
             {
                 **lesson,
@@ -467,16 +1460,20 @@ def build_lesson_progress(
             }
         )
 
-    if not found_current:
-        # all lessons completed, mark the last one as current to avoid empty states
-        if lessons:
-            lessons[-1]["status"] = "current"
-
     return {
         "skillLevel": skill_level or "intermediate",
         "lessons": lessons,
     }
 
+
+def build_lesson_progress(
+    user: dict,
+) -> dict:
+    skill_level: SkillLevel | None = user.get("skillLevel")  # type: ignore[assignment]
+    if skill_level not in LESSON_TABLES:
+        skill_level = None
+    return render_lesson_progress(skill_level, completed_lesson_mask(user))
+
 #score calculation based on deltas from when the participant joined
 def calculate_score(participant: dict) -> int:
     easy_gain = max(
@@ -502,8 +1499,13 @@ def serialize_tournament(tournament: dict) -> dict:
         tournament["streak"] = 0
     if "lastChecked" not in tournament:
         tournament["lastChecked"] = None
+    if "lastRefreshed" not in tournament:
+        tournament["lastRefreshed"] = None
+    tournament.setdefault("stale", False)
     if "participants" not in tournament:
         tournament["participants"] = []
+    #standings are stored in join order and ranked here, at read time (stable, so ties keep join order)
+    tournament["participants"].sort(key=lambda p: p.get("score", 0), reverse=True)
     #normalize times to include timezone for frontend parsing
     for key in ("startTime", "endTime"):
         ts = tournament.get(key)
@@ -521,12 +1523,196 @@ def apply_profile_to_participant(participant: dict, profile: dict) -> dict:
     return participant
 
 
-async def award_user_points(user: dict, latest_profile: dict) -> int:
+class OrderStatisticNode:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left: "OrderStatisticNode | None" = None
+        self.right: "OrderStatisticNode | None" = None
+
+
+class OrderStatisticTree:
     """
-    Adds account points for newly solved problems since the user's last stored profile.
-    Points are awarded once per newly solved problem across all tournaments.
+    Treap of unique, sortable keys where every node knows its subtree size.
+    insert/remove/count_less/select are all O(log n) expected.
+    """
+
+    def __init__(self):
+        self._root: OrderStatisticNode | None = None
+
+    def __len__(self) -> int:
+        return self._size(self._root)
+
+    @staticmethod
+    def _size(node: OrderStatisticNode | None) -> int:
+        return node.size if node else 0
+
+    def _update(self, node: OrderStatisticNode) -> None:
+        node.size = 1 + self._size(node.left) + self._size(node.right)
+
+    def _split(self, node, key: tuple, inclusive: bool):
+        #left side gets keys < key (or <= key when inclusive), right side gets the rest
+        if node is None:
+            return None, None
+        goes_left = node.key <= key if inclusive else node.key < key
+        if goes_left:
+            node.right, right = self._split(node.right, key, inclusive)
+            self._update(node)
+            return node, right
+        left, node.left = self._split(node.left, key, inclusive)
+        self._update(node)
+        return left, node
+
+    def _merge(self, left, right):
+        if left is None or right is None:
+            return left or right
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            self._update(left)
+            return left
+        right.left = self._merge(left, right.left)
+        self._update(right)
+        return right
+
+    def insert(self, key: tuple) -> None:
+        left, right = self._split(self._root, key, inclusive=False)
+        self._root = self._merge(self._merge(left, OrderStatisticNode(key)), right)
+
+    def remove(self, key: tuple) -> None:
+        left, right = self._split(self._root, key, inclusive=False)
+        _, right = self._split(right, key, inclusive=True)
+        self._root = self._merge(left, right)
+
+    def count_less(self, key: tuple) -> int:
+        count = 0
+        node = self._root
+        while node is not None:
+            if node.key < key:
+                count += self._size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def select(self, index: int) -> tuple:
+        """
+        Returns the key at 0-based position `index` in sorted order.
+        """
+        node = self._root
+        while node is not None:
+            left_size = self._size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key
+            else:
+                index -= left_size + 1
+                node = node.right
+        raise IndexError(index)
+
+
+class PointsLeaderboard:
+    """
+    Global points ranking kept in memory and updated on every points mutation.
+    Rebuilt from Mongo at startup. Each worker keeps its own copy, so with several
+    workers a user's rank can lag until that worker sees the change or restarts.
+    """
+
+    def __init__(self):
+        self._tree = OrderStatisticTree()
+        #user id -> (points, username)
+        self._entries: dict[str, tuple[int, str | None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(user_id: str, points: int) -> tuple:
+        #highest points first, ties broken by id so every key is unique
+        return (-points, user_id)
+
+    def update(self, user_id: str, points: int, username: str | None = None) -> None:
+        previous = self._entries.get(user_id)
+        if previous is not None:
+            if username is None:
+                username = previous[1]
+            if previous[0] == points:
+                self._entries[user_id] = (points, username)
+                return
+            self._tree.remove(self._key(user_id, previous[0]))
+        self._entries[user_id] = (points, username)
+        self._tree.insert(self._key(user_id, points))
+
+    def track(self, user: dict) -> None:
+        if user and "points" in user:
+            self.update(str(user["_id"]), int(user.get("points") or 0), user.get("username"))
+
+    def remove(self, user_id: str) -> None:
+        previous = self._entries.pop(user_id, None)
+        if previous is not None:
+            self._tree.remove(self._key(user_id, previous[0]))
+
+    async def rebuild(self) -> None:
+        tree = OrderStatisticTree()
+        entries: dict[str, tuple[int, str | None]] = {}
+        async for user in users_collection.find({}, {"points": 1, "username": 1}):
+            user_id = str(user["_id"])
+            points = int(user.get("points") or 0)
+            entries[user_id] = (points, user.get("username"))
+            tree.insert(self._key(user_id, points))
+        self._tree = tree
+        self._entries = entries
+
+    def _entry_at(self, index: int) -> dict:
+        _, user_id = self._tree.select(index)
+        points, username = self._entries[user_id]
+        return {"id": user_id, "username": username, "points": points, "rank": self.rank_for_points(points)}
+
+    def rank_for_points(self, points: int) -> int:
+        #competition ranking: 1 + number of users with strictly more points
+        return self._tree.count_less((-points, "")) + 1
+
+    def top(self, limit: int) -> list[dict]:
+        return [self._entry_at(index) for index in range(min(limit, len(self._entries)))]
+
+    def around(self, user_id: str, neighbours: int) -> dict | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        position = self._tree.count_less(self._key(user_id, entry[0]))
+        start = max(0, position - neighbours)
+        stop = min(len(self._entries), position + neighbours + 1)
+        return {
+            "rank": self.rank_for_points(entry[0]),
+            "points": entry[0],
+            "totalUsers": len(self._entries),
+            "entries": [self._entry_at(index) for index in range(start, stop)],
+        }
+
+
+points_leaderboard = PointsLeaderboard()
+
+
+PROFILE_COUNT_FIELDS = ("totalSolved", "easySolved", "mediumSolved", "hardSolved")
+
+
+def build_points_award(user: dict, latest_profile: dict) -> tuple[int, dict, dict | None]:
+    """
+    Works out the account points earned since the user's last stored profile.
+    Returns the gain, the filter conditions that guard the update (the stored profile must
+    still be the one the gain was computed from) and the update document.
+    The update is None when the solve counts have not moved: rewriting the profile just for a
+    newer lastUpdated would bump the version and break every ETag the user has.
+    Shared by the single and bulk paths.
     """
     previous_profile = user.get("leetcodeProfile") or {}
+    if previous_profile and all(
+        previous_profile.get(field) == latest_profile.get(field) for field in PROFILE_COUNT_FIELDS
+    ):
+        return 0, {}, None
     baseline = {
         "easySolved": previous_profile.get("easySolved", latest_profile["easySolved"]),
         "mediumSolved": previous_profile.get("mediumSolved", latest_profile["mediumSolved"]),
@@ -543,38 +1729,150 @@ async def award_user_points(user: dict, latest_profile: dict) -> int:
         + hard_gain * POINT_VALUES["hard"]
     )
 
-    if total_gain > 0:
-        new_points = int(user.get("points", 0)) + total_gain
-        await users_collection.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"points": new_points, "leetcodeProfile": latest_profile}},
-        )
+    #compare-and-set on the counts the gain was computed from, so two tabs refreshing at once
+    #cannot both award the same solves
+    if previous_profile:
+        conditions = {
+            f"leetcodeProfile.{field}": previous_profile[field]
+            for field in ("easySolved", "mediumSolved", "hardSolved")
+            if field in previous_profile
+        }
     else:
-        await users_collection.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"leetcodeProfile": latest_profile}},
-        )
+        #matches a missing, null or empty stored profile exactly as it was read
+        conditions = {"leetcodeProfile": user.get("leetcodeProfile")}
+
+    update: dict = {"$set": {"leetcodeProfile": latest_profile}}
+    if total_gain > 0:
+        update["$inc"] = {"points": total_gain}
+    return total_gain, conditions, update
 
-    return total_gain
+
+AWARD_MAX_ATTEMPTS = 3
+
+
+async def award_user_points(
+    user: dict, latest_profile: dict, fields: dict | None = None
+) -> tuple[int, dict | None]:
+    """
+    Adds account points for newly solved problems since the user's last stored profile.
+    Points are awarded once per newly solved problem across all tournaments.
+    One find_one_and_update in the common case; if another request recorded a newer profile
+    in between, the user is re-read and the gain recomputed against it.
+    Returns the points awarded and the updated user (projected to `fields`), or None if the user is gone.
+    """
+    for attempt in range(AWARD_MAX_ATTEMPTS):
+        total_gain, conditions, update = build_points_award(user, latest_profile)
+        if update is None:
+            #nothing new solved, nothing to write; the caller's full document is still current
+            if attempt == 0 and fields is None:
+                return 0, user
+            return 0, await find_user(user["_id"], fields)
+        updated = await update_user_document(user["_id"], update, fields=fields, conditions=conditions)
+        if updated is not None:
+            if total_gain > 0:
+                points_leaderboard.track(updated)
+            return total_gain, updated
+        user = await find_user(user["_id"], {"leetcodeProfile": 1, "points": 1})
+        if user is None:
+            return 0, None
+    #still racing after a few tries: someone else keeps recording newer profiles, let them award
+    logger.warning("Gave up awarding points to %s after %s attempts", user["_id"], AWARD_MAX_ATTEMPTS)
+    return 0, await find_user(user["_id"], fields)
+
+
+#bump when the stored user shape changes and teach UserSchemaMigration.upgrade about it.
+#documents at this version have every default persisted, completion as completedMask only
+#and the room in its compact form
+USER_SCHEMA_VERSION = 1
 
 
 def ensure_user_defaults(user: dict) -> dict:
-    user.setdefault("points", 0)
-    user.setdefault("streakSaves", 0)
-    user.setdefault("skillLevel", None)
-    user.setdefault("completedLessons", [])
-    user["roomItems"] = normalize_room_items(user.get("roomItems"))
+    if user.get("schemaVersion") != USER_SCHEMA_VERSION:
+        #not migrated yet, patch the defaults in on the way out
+        user.setdefault("points", 0)
+        user.setdefault("streakSaves", 0)
+        user.setdefault("skillLevel", None)
+    user["completedLessons"] = completed_lesson_ids(user)
+    #only full user responses come through here, narrow endpoints never decode the room
+    user["roomItems"] = room_items_for(user)
+    user.pop("room", None)
     return user
 
 
+def bump_version(update: dict) -> dict:
+    """
+    Adds `version += 1` to an update document. Every write to a user or tournament goes
+    through this so the version (and the ETag built from it) changes whenever the document does.
+    """
+    return {**update, "$inc": {**update.get("$inc", {}), "version": 1}}
+
+
+def document_etag(document_id, version: int | None) -> str:
+    return f'"{document_id}-{int(version or 0)}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    #weak comparison, as If-None-Match asks for
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or any(candidate.removeprefix("W/") == bare for candidate in candidates)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    #no-cache means "revalidate every time", which lets the browser send If-None-Match on its own
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+#user data access for the narrow endpoints: each one names the fields it reads,
+#so the avatar url, room items and leetcode profile never leave mongo for them
+USER_FIELDS_ID = {"_id": 1}
+USER_FIELDS_VERSION = {"version": 1}
+USER_FIELDS_LESSONS = {"skillLevel": 1, "completedMask": 1, "completedLessons": 1, "points": 1}
+USER_FIELDS_WALLET = {"points": 1, "streakSaves": 1}
+
+
+async def find_user(user_id: str | ObjectId, fields: dict | None = None) -> dict | None:
+    return await users_collection.find_one({"_id": ObjectId(user_id)}, fields)
+
+
+async def update_user_document(
+    user_id: str | ObjectId,
+    update: dict,
+    fields: dict | None = None,
+    conditions: dict | None = None,
+) -> dict | None:
+    """
+    Applies `update` and returns the updated user projected to `fields`,
+    or None if the user does not exist or does not match `conditions`.
+    """
+    return await users_collection.find_one_and_update(
+        {"_id": ObjectId(user_id), **(conditions or {})},
+        bump_version(update),
+        projection=fields,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
 async def consume_streak_save(user_id: ObjectId) -> bool:
     """
     Atomically consume a streak save if the user has one available.
     """
-    result = await users_collection.find_one_and_update(
-        {"_id": user_id, "streakSaves": {"$gt": 0}},
+    result = await update_user_document(
+        user_id,
         {"$inc": {"streakSaves": -1}},
-        return_document=ReturnDocument.AFTER,
+        fields=USER_FIELDS_ID,
+        conditions={"streakSaves": {"$gt": 0}},
     )
     return result is not None
 
@@ -593,88 +1891,527 @@ def build_participant_from_profile(user: dict, profile: dict) -> dict:
         "initialHardSolved": profile["hardSolved"],
         "currentHardSolved": profile["hardSolved"],
         "score": 0,
+        #the daily streak check counts solves after this
+        "streakBaselineSolved": profile["totalSolved"],
     }
 
 
-async def refresh_tournament(tournament: dict) -> dict:
-    participants = tournament.get("participants", [])
-    today = datetime.utcnow().date().isoformat()
-    should_check_streak = tournament.get("lastChecked") != today
-    streak_survived = True
-    updated_participants: list[dict] = []
-
-    for participant in participants:
-        previous_total = participant.get("currentTotalSolved", participant.get("initialTotalSolved", 0))
-        user = await users_collection.find_one({"_id": ObjectId(participant["id"])})
-        latest_profile = None
-        save_used = False
-        streak_broken = False
-
-        if user and user.get("lcUsername"):
-            user = ensure_user_defaults(user)
-            latest_profile = fetch_leetcode_profile(user["lcUsername"])
-            if latest_profile:
-                participant["lcUsername"] = user["lcUsername"]
-                await award_user_points(user, latest_profile)
-                participant = apply_profile_to_participant(participant, latest_profile)
-            elif should_check_streak:
-                streak_broken = True
-
-        if should_check_streak and latest_profile:
-            if latest_profile["totalSolved"] <= previous_total:
-                streak_broken = True
-        elif should_check_streak and not latest_profile:
-            #if we cannot fetch data, treat it as a broken streak for safety
-            streak_broken = True
-
-        if streak_broken and user:
-            save_used = await consume_streak_save(user["_id"])
-            streak_broken = not save_used
-
-        if streak_broken:
-            streak_survived = False
-
-        #ensure score is present even if we did not fetch an update
-        participant.setdefault("score", calculate_score(participant))
-        if save_used:
-            participant["streakSaveUsedOn"] = today
-        updated_participants.append(participant)
-
-    updated_participants.sort(key=lambda p: p.get("score", 0), reverse=True)
-
-    update_fields: dict = {"participants": updated_participants}
-    if should_check_streak:
-        if updated_participants and streak_survived:
-            update_fields["streak"] = int(tournament.get("streak", 0)) + 1
-        else:
-            update_fields["streak"] = 0
-        update_fields["lastChecked"] = today
-
-    updated = await tournaments_collection.find_one_and_update(
-        {"_id": tournament["_id"]},
-        {"$set": update_fields},
-        return_document=ReturnDocument.AFTER,
-    )
-
-    if updated is None:
-        updated = {**tournament, **update_fields}
-    return serialize_tournament(updated)
+def refresh_participant(participant: dict, user: dict | None, latest_profile: dict | None) -> dict:
+    """
+    Applies a fetched profile to one participant.
+    Points for the profile have already been awarded by plan_tournament_refresh.
+    """
+    if user and user.get("lcUsername") and latest_profile:
+        participant["lcUsername"] = user["lcUsername"]
+        participant = apply_profile_to_participant(participant, latest_profile)
 
-#this is used when updated a users leetcode profile
-def fetch_leetcode_profile(username: str):
-    response = requests.post(
-        LEETCODE_GRAPHQL_URL,
-        json={"query": LEETCODE_QUERY, "variables": {"username": username}},
-        headers={"Content-Type": "application/json"},
-        timeout=10
-    )
+    #ensure score is present even if we did not fetch an update
+    participant.setdefault("score", calculate_score(participant))
+    return participant
 
-    data = response.json()
 
-    if "data" not in data or data["data"]["matchedUser"] is None:
-        return None
+REFRESH_USER_PROJECTION = {"lcUsername": 1, "leetcodeProfile": 1, "points": 1, "streakSaves": 1}
 
-    stats = data["data"]["matchedUser"]["submitStats"]["acSubmissionNum"]
+
+async def plan_tournament_refresh(tournaments: list[dict], background: bool = False) -> dict:
+    """
+    Loads every distinct participant across `tournaments` in one query, fetches their profiles once
+    and awards their points in one bulk write. The returned plan is shared by refresh_tournament calls
+    so a user in many tournaments costs one lookup instead of one per tournament.
+    While LeetCode is unavailable, stored profiles are used and the user is listed in plan["stale"].
+    Background jobs pass background=True to wait for rate-limit tokens instead of failing fast.
+    """
+    participant_ids = list(
+        dict.fromkeys(
+            participant["id"]
+            for tournament in tournaments
+            for participant in tournament.get("participants", [])
+        )
+    )
+
+    #one $in lookup for every participant, projected to what the refresh actually reads
+    found: dict[str, dict] = {}
+    if participant_ids:
+        cursor = users_collection.find(
+            {"_id": {"$in": [ObjectId(participant_id) for participant_id in participant_ids]}},
+            REFRESH_USER_PROJECTION,
+        )
+        async for user in cursor:
+            found[str(user["_id"])] = user
+    users: dict[str, dict | None] = {
+        participant_id: found.get(participant_id) for participant_id in participant_ids
+    }
+
+    #one batched graphql round trip per LEETCODE_BATCH_SIZE users instead of one each
+    fetched = await fetch_leetcode_profiles(
+        [user["lcUsername"] for user in users.values() if user and user.get("lcUsername")],
+        background=background,
+    )
+    profiles: dict[str, dict | None] = {}
+    #participants whose profile could not be fetched and is served from the stored copy instead
+    stale: set[str] = set()
+    for participant_id, user in users.items():
+        if not user or not user.get("lcUsername"):
+            profiles[participant_id] = None
+        elif user["lcUsername"] in fetched:
+            profiles[participant_id] = fetched[user["lcUsername"]]
+        else:
+            profiles[participant_id] = user.get("leetcodeProfile")
+            stale.add(participant_id)
+
+    #point/profile updates for every user go out as a single unordered bulk write
+    operations: list[UpdateOne] = []
+    awarded: list[dict] = []
+    for participant_id in participant_ids:
+        user = users[participant_id]
+        profile = profiles[participant_id]
+        if not user or not profile or participant_id in stale:
+            continue
+        total_gain, conditions, update = build_points_award(user, profile)
+        if update is None:
+            continue
+        #if the guard misses, a concurrent request already recorded a newer profile and awarded it
+        operations.append(UpdateOne({"_id": user["_id"], **conditions}, bump_version(update)))
+        #keep the loaded copy in step with what is about to be stored
+        user["leetcodeProfile"] = profile
+        if total_gain > 0:
+            user["points"] = int(user.get("points", 0)) + total_gain
+            awarded.append(user)
+
+    if operations:
+        await users_collection.bulk_write(operations, ordered=False)
+    if awarded:
+        #a guarded award can lose to a concurrent one, so rank users by what was actually stored
+        stored = users_collection.find({"_id": {"$in": [user["_id"] for user in awarded]}}, {"points": 1})
+        async for user in stored:
+            users[str(user["_id"])]["points"] = user.get("points", 0)
+            points_leaderboard.track(user)
+    return {"users": users, "profiles": profiles, "stale": stale}
+
+
+PARTICIPANT_REFRESH_FIELDS = [
+    "lcUsername",
+    "currentTotalSolved",
+    "currentEasySolved",
+    "currentMediumSolved",
+    "currentHardSolved",
+    "score",
+]
+
+
+async def refresh_tournament(tournament: dict, plan: dict | None = None) -> dict:
+    #streaks are settled once a day by streak_evaluator, refreshing only moves the standings
+    participants = tournament.get("participants", [])
+    if plan is None:
+        plan = await plan_tournament_refresh([tournament])
+    users: dict[str, dict | None] = plan["users"]
+    profiles: dict[str, dict | None] = plan["profiles"]
+    stale = any(participant["id"] in plan["stale"] for participant in participants)
+
+    #refresh_participant edits participants in place, so remember what is stored to diff against
+    before = [
+        {field: participant.get(field) for field in PARTICIPANT_REFRESH_FIELDS} for participant in participants
+    ]
+    updated_participants = [
+        refresh_participant(participant, users.get(participant["id"]), profiles.get(participant["id"]))
+        for participant in participants
+    ]
+
+    #only participants whose numbers moved are written, each through its own positional
+    #array filter, so concurrent joins/refreshes never overwrite the rest of the array
+    update_fields: dict = {"stale": stale}
+    array_filters: list[dict] = []
+    for participant, previous in zip(updated_participants, before):
+        changed = {
+            field: participant.get(field)
+            for field in PARTICIPANT_REFRESH_FIELDS
+            if field in participant and participant.get(field) != previous[field]
+        }
+        if not changed:
+            continue
+        identifier = f"p{len(array_filters)}"
+        array_filters.append({f"{identifier}.id": participant["id"]})
+        for field, value in changed.items():
+            update_fields[f"participants.$[{identifier}].{field}"] = value
+    if not stale:
+        now = datetime.now(timezone.utc)
+        update_fields["lastRefreshed"] = now.isoformat()
+        end_time = parse_tournament_time(tournament.get("endTime"))
+        if end_time is not None and end_time <= now:
+            #final standings are in, the background refresh leaves this tournament alone from now on
+            update_fields["finalized"] = True
+
+    #lastRefreshed alone does not count as a change, so polling clients keep their cached copy
+    changed = bool(array_filters) or stale != tournament.get("stale", False)
+    update: dict = {"$set": update_fields}
+    updated = await tournaments_collection.find_one_and_update(
+        {"_id": tournament["_id"]},
+        bump_version(update) if changed else update,
+        array_filters=array_filters or None,
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if updated is None:
+        updated = {
+            **tournament,
+            **{field: value for field, value in update_fields.items() if not field.startswith("participants.")},
+        }
+    return serialize_tournament(updated)
+
+
+def parse_tournament_time(value: str | None) -> datetime | None:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def needs_background_refresh(tournament: dict, now: datetime) -> bool:
+    """
+    Active tournaments are always refreshed. Ended ones get one final refresh
+    if they have not been refreshed since their end time, then are left alone.
+    """
+    end_time = parse_tournament_time(tournament.get("endTime"))
+    if end_time is None or end_time > now:
+        return True
+    last_refreshed = parse_tournament_time(tournament.get("lastRefreshed"))
+    return last_refreshed is None or last_refreshed < end_time
+
+
+TOURNAMENT_REFRESH_INTERVAL_SECONDS = float(os.getenv("TOURNAMENT_REFRESH_INTERVAL_SECONDS", "60"))
+#tournaments refreshed per shared plan_tournament_refresh
+TOURNAMENT_REFRESH_CHUNK_SIZE = int(os.getenv("TOURNAMENT_REFRESH_CHUNK_SIZE", "50"))
+TOURNAMENT_SCHEDULER_ENABLED = os.getenv("TOURNAMENT_SCHEDULER_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+class TournamentRefreshScheduler:
+    """
+    In-process loop that refreshes tournament standings every `interval` seconds
+    so GET /tournaments/ can serve what is stored instead of refreshing inline.
+    """
+
+    def __init__(self, interval: float, chunk_size: int, enabled: bool = True):
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+        self.last_run: dict | None = None
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Tournament refresh run failed")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> dict:
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        refreshed = 0
+        failed = 0
+        chunks = 0
+
+        async def refresh_chunk(chunk: list[dict]) -> None:
+            nonlocal refreshed, failed
+            #one plan per chunk keeps the $in lookup, the profile batch and the bulk write bounded
+            plan = await plan_tournament_refresh(chunk, background=True)
+            for tournament in chunk:
+                try:
+                    await refresh_tournament(tournament, plan)
+                    refreshed += 1
+                except Exception:
+                    failed += 1
+                    logger.exception("Failed to refresh tournament %s", tournament.get("_id"))
+
+        #finalized tournaments (ended and refreshed once since) never leave mongo
+        chunk: list[dict] = []
+        async for tournament in tournaments_collection.find({"finalized": {"$ne": True}}).batch_size(self.chunk_size):
+            if not needs_background_refresh(tournament, now):
+                continue
+            chunk.append(tournament)
+            if len(chunk) >= self.chunk_size:
+                await refresh_chunk(chunk)
+                chunks += 1
+                chunk = []
+        if chunk:
+            await refresh_chunk(chunk)
+            chunks += 1
+
+        self.last_run = {
+            "finishedAt": datetime.now(timezone.utc).isoformat(),
+            "refreshed": refreshed,
+            "failed": failed,
+            "chunks": chunks,
+            "durationSeconds": round(time.monotonic() - started, 3),
+        }
+        return self.last_run
+
+
+tournament_scheduler = TournamentRefreshScheduler(
+    TOURNAMENT_REFRESH_INTERVAL_SECONDS, TOURNAMENT_REFRESH_CHUNK_SIZE, enabled=TOURNAMENT_SCHEDULER_ENABLED
+)
+
+
+STREAK_EVALUATOR_ENABLED = os.getenv("STREAK_EVALUATOR_ENABLED", "true").lower() not in ("0", "false", "no")
+#tournaments per plan_tournament_refresh call, and how many of those chunks run at once
+STREAK_CHUNK_SIZE = int(os.getenv("STREAK_CHUNK_SIZE", "50"))
+STREAK_PARALLEL_CHUNKS = int(os.getenv("STREAK_PARALLEL_CHUNKS", "4"))
+#how soon to retry tournaments deferred because leetcode was unavailable
+STREAK_RETRY_SECONDS = float(os.getenv("STREAK_RETRY_SECONDS", "300"))
+#run a little after midnight UTC so profile caches from the old day have had a chance to expire
+STREAK_ROLLOVER_DELAY_SECONDS = float(os.getenv("STREAK_ROLLOVER_DELAY_SECONDS", "30"))
+
+#how long a claimed (tournament, day) stays locked to one evaluator; a crashed evaluator's claim
+#simply expires and the next run settles the day
+STREAK_CLAIM_LEASE_SECONDS = float(os.getenv("STREAK_CLAIM_LEASE_SECONDS", "300"))
+
+STREAK_TOURNAMENT_PROJECTION = {
+    "startTime": 1,
+    "endTime": 1,
+    "lastChecked": 1,
+    "participants.id": 1,
+    "participants.streakBaselineSolved": 1,
+    "participants.streakSaveUsedOn": 1,
+}
+
+
+def active_on(tournament: dict, day_start: datetime, day_end: datetime) -> bool:
+    start_time = parse_tournament_time(tournament.get("startTime"))
+    end_time = parse_tournament_time(tournament.get("endTime"))
+    return (start_time is None or start_time < day_end) and (end_time is None or end_time > day_start)
+
+
+async def evaluate_tournament_streak(tournament: dict, plan: dict, today: str) -> str:
+    """
+    Settles the day that just ended for one tournament: a participant keeps the streak alive by
+    solving anything since their streakBaselineSolved, or by spending a streak save.
+
+    The tournament is first leased to this evaluator (streakClaim), then lastChecked, the streak,
+    the baselines and the lease release are written together in one update, so each
+    (tournament, day) is settled at most once however many evaluators run. If anything fails in
+    between, the lease is dropped (or expires) and the day is retried; saves already spent are
+    recorded on the participant right away (streakSaveUsedOn) and are not spent twice.
+    Returns the outcome for the run summary.
+    """
+    participants = tournament.get("participants", [])
+    if any(participant["id"] in plan["stale"] for participant in participants):
+        #stale data cannot tell us who solved, leave lastChecked alone and retry later
+        return "deferred"
+
+    token = ObjectId()
+    now = datetime.now(timezone.utc)
+    claimed = await tournaments_collection.find_one_and_update(
+        {
+            "_id": tournament["_id"],
+            "lastChecked": {"$ne": today},
+            "$or": [{"streakClaim": {"$exists": False}}, {"streakClaim.until": {"$lt": now}}],
+        },
+        {"$set": {"streakClaim": {"token": token, "until": now + timedelta(seconds=STREAK_CLAIM_LEASE_SECONDS)}}},
+        projection={"_id": 1},
+    )
+    if claimed is None:
+        return "skipped"
+
+    try:
+        update_fields: dict = {"lastChecked": today}
+        array_filters: list[dict] = []
+        judged = broken = False
+        for participant in participants:
+            user = plan["users"].get(participant["id"])
+            profile = plan["profiles"].get(participant["id"])
+            solved = profile["totalSolved"] if profile else None
+            baseline = participant.get("streakBaselineSolved")
+            identifier = f"p{len(array_filters)}"
+            changed: dict = {}
+            #participants from before baselines existed are only given one on their first check
+            if baseline is not None:
+                judged = True
+                #no leetcode data counts as a miss, same as no solves
+                if solved is None or solved <= baseline:
+                    if participant.get("streakSaveUsedOn") == today:
+                        #spent by an earlier attempt at this day that did not finish
+                        pass
+                    elif user and await consume_streak_save(user["_id"]):
+                        await tournaments_collection.update_one(
+                            {"_id": tournament["_id"]},
+                            {"$set": {f"participants.$[{identifier}].streakSaveUsedOn": today}},
+                            array_filters=[{f"{identifier}.id": participant["id"]}],
+                        )
+                        changed["streakSaveUsedOn"] = today
+                    else:
+                        broken = True
+            if solved is not None and solved != baseline:
+                changed["streakBaselineSolved"] = solved
+            if not changed:
+                continue
+            array_filters.append({f"{identifier}.id": participant["id"]})
+            for field, value in changed.items():
+                update_fields[f"participants.$[{identifier}].{field}"] = value
+
+        update: dict = {"$set": update_fields, "$unset": {"streakClaim": ""}}
+        if judged and broken:
+            update_fields["streak"] = 0
+        elif judged:
+            update["$inc"] = {"streak": 1}
+        settled = await tournaments_collection.update_one(
+            {"_id": tournament["_id"], "streakClaim.token": token},
+            bump_version(update),
+            array_filters=array_filters or None,
+        )
+    except Exception:
+        await tournaments_collection.update_one(
+            {"_id": tournament["_id"], "streakClaim.token": token},
+            {"$unset": {"streakClaim": ""}},
+        )
+        raise
+    if settled.matched_count == 0:
+        #the lease ran out and another evaluator took the day over
+        return "skipped"
+    if not judged:
+        return "baseline"
+    return "broken" if broken else "kept"
+
+
+class StreakEvaluator:
+    """
+    Settles every tournament's streak once per UTC day, shortly after midnight, in chunks of
+    `chunk_size` tournaments with up to `parallel_chunks` chunks in flight. Each chunk shares
+    one plan_tournament_refresh, so a user in many tournaments is fetched once per chunk.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        parallel_chunks: int,
+        retry_interval: float,
+        rollover_delay: float,
+        enabled: bool = True,
+    ):
+        self.chunk_size = chunk_size
+        self.parallel_chunks = parallel_chunks
+        self.retry_interval = retry_interval
+        self.rollover_delay = rollover_delay
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+        self.last_run: dict | None = None
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def seconds_until_rollover(self, now: datetime) -> float:
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (tomorrow - now).total_seconds() + self.rollover_delay
+
+    async def _loop(self) -> None:
+        #the first run catches up on a rollover missed while the server was down
+        while True:
+            summary = None
+            try:
+                summary = await self.run_once()
+            except Exception:
+                logger.exception("Streak evaluation run failed")
+            if summary is None or summary["deferred"] or summary["failed"]:
+                await asyncio.sleep(self.retry_interval)
+            else:
+                await asyncio.sleep(self.seconds_until_rollover(datetime.now(timezone.utc)))
+
+    async def run_once(self) -> dict:
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        today = now.date().isoformat()
+        today_start = datetime.combine(now.date(), datetime.min.time(), tzinfo=timezone.utc)
+        #tournaments that were running at any point during the day being settled; the endTime
+        #bound keeps long-ended tournaments (whose lastChecked never advances) out of the scan
+        due = [
+            tournament
+            async for tournament in tournaments_collection.find(
+                {
+                    "lastChecked": {"$ne": today},
+                    "endTime": {"$gt": (today_start - timedelta(days=1)).isoformat()},
+                },
+                STREAK_TOURNAMENT_PROJECTION,
+            )
+            if active_on(tournament, today_start - timedelta(days=1), today_start)
+        ]
+        outcomes = {"kept": 0, "broken": 0, "baseline": 0, "deferred": 0, "skipped": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(self.parallel_chunks)
+
+        async def evaluate_chunk(chunk: list[dict]) -> None:
+            async with semaphore:
+                try:
+                    plan = await plan_tournament_refresh(chunk, background=True)
+                except Exception:
+                    outcomes["failed"] += len(chunk)
+                    logger.exception("Could not load profiles for a streak chunk")
+                    return
+                for tournament in chunk:
+                    try:
+                        outcomes[await evaluate_tournament_streak(tournament, plan, today)] += 1
+                    except Exception:
+                        outcomes["failed"] += 1
+                        logger.exception("Failed to settle the streak of tournament %s", tournament.get("_id"))
+
+        chunks = [due[index:index + self.chunk_size] for index in range(0, len(due), self.chunk_size)]
+        await asyncio.gather(*(evaluate_chunk(chunk) for chunk in chunks))
+        self.last_run = {
+            "day": today,
+            "finishedAt": datetime.now(timezone.utc).isoformat(),
+            "tournaments": len(due),
+            "chunks": len(chunks),
+            **outcomes,
+            "durationSeconds": round(time.monotonic() - started, 3),
+        }
+        if due:
+            logger.info("Streak evaluation %s", self.last_run)
+        return self.last_run
+
+
+streak_evaluator = StreakEvaluator(
+    STREAK_CHUNK_SIZE,
+    STREAK_PARALLEL_CHUNKS,
+    STREAK_RETRY_SECONDS,
+    STREAK_ROLLOVER_DELAY_SECONDS,
+    enabled=STREAK_EVALUATOR_ENABLED,
+)
+
+def parse_leetcode_profile(matched_user: dict | None) -> dict | None:
+    if matched_user is None:
+        return None
+
+    stats = matched_user["submitStats"]["acSubmissionNum"]
 
     return {
         "totalSolved": stats[0]["count"],
@@ -684,6 +2421,352 @@ def fetch_leetcode_profile(username: str):
         "lastUpdated": datetime.utcnow().isoformat(),
     }
 
+async def fetch_leetcode_profile_uncached(username: str):
+    data = await leetcode_client.query(LEETCODE_QUERY, {"username": username})
+
+    if not data or "data" not in data or not data["data"]:
+        return None
+
+    return parse_leetcode_profile(data["data"].get("matchedUser"))
+
+background_leetcode_batches = asyncio.Semaphore(LEETCODE_BACKGROUND_BATCHES_IN_FLIGHT)
+
+
+async def fetch_leetcode_profiles_uncached(
+    usernames: list[str], background: bool = False
+) -> dict[str, dict | None]:
+    """
+    Fetches many profiles with aliased matchedUser fields, LEETCODE_BATCH_SIZE per request.
+    A user that does not resolve (null matchedUser) maps to None, users in a batch
+    that could not be sent are left out. Background fetches wait for rate-limit tokens
+    instead of giving up after LEETCODE_RATE_MAX_WAIT_SECONDS.
+    """
+    results: dict[str, dict | None] = {}
+    batches = [
+        usernames[i : i + LEETCODE_BATCH_SIZE] for i in range(0, len(usernames), LEETCODE_BATCH_SIZE)
+    ]
+
+    async def send(batch: list[str]) -> dict:
+        query = build_batched_profile_query(len(batch))
+        variables = {f"u{i}": username for i, username in enumerate(batch)}
+        if not background:
+            return await leetcode_client.query(query, variables)
+        async with background_leetcode_batches:
+            return await leetcode_client.query(query, variables, max_wait=LEETCODE_BACKGROUND_MAX_WAIT_SECONDS)
+
+    async def run_batch(batch: list[str]) -> None:
+        try:
+            data = await send(batch)
+        except LeetCodeUnavailable:
+            #leave the batch out of the results, callers fall back to stored profiles
+            return
+        matched = (data or {}).get("data") or {}
+        for i, username in enumerate(batch):
+            results[username] = parse_leetcode_profile(matched.get(f"u{i}"))
+
+    await asyncio.gather(*(run_batch(batch) for batch in batches))
+    return results
+
+#this is used when updated a users leetcode profile
+#goes through the profile cache so repeat lookups within the ttl never reach leetcode
+#raises LeetCodeUnavailable if leetcode could not be asked, None means no such user
+async def fetch_leetcode_profile(username: str):
+    return await profile_cache.get_or_fetch(username, fetch_leetcode_profile_uncached)
+
+
+async def fetch_leetcode_profiles(usernames: list[str], background: bool = False) -> dict[str, dict | None]:
+    """
+    Batched fetch_leetcode_profile. Returns the same profile dicts, keyed by username.
+    """
+    if not usernames:
+        return {}
+    return await profile_cache.get_or_fetch_many(
+        usernames, functools.partial(fetch_leetcode_profiles_uncached, background=background)
+    )
+
+#avatars live in a content-addressed gridfs bucket (filename = sha256 of the image bytes),
+#the user document only keeps the url they are served from
+AVATAR_MAX_CHARS = 8_000_000
+AVATAR_URL_PREFIX = "/avatars/"
+AVATAR_THUMBNAIL_SIZES = (64, 128, 256)
+AVATAR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+AVATAR_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+avatar_bucket = AsyncGridFSBucket(db, bucket_name="avatars")
+
+
+def sniff_image_type(content: bytes) -> str | None:
+    for signature, content_type in AVATAR_SIGNATURES.items():
+        if content.startswith(signature):
+            return content_type
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_avatar(data: str) -> tuple[bytes, str]:
+    """
+    Accepts a data url or bare base64 string and returns the image bytes and content type.
+    """
+    if data.startswith("data:"):
+        _, _, data = data.partition(",")
+    try:
+        content = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Avatar is not valid base64.")
+    content_type = sniff_image_type(content)
+    if content_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Avatar must be a PNG, JPEG, GIF or WebP image.",
+        )
+    return content, content_type
+
+
+async def find_avatar_blob(name: str) -> tuple[bytes, str] | None:
+    try:
+        stream = await avatar_bucket.open_download_stream_by_name(name)
+    except NoFile:
+        return None
+    content = await stream.read()
+    return content, (stream.metadata or {}).get("contentType", "application/octet-stream")
+
+
+async def store_avatar_blob(name: str, content: bytes, content_type: str) -> None:
+    #content addressed, so an existing blob with this name already holds exactly these bytes
+    async for _ in avatar_bucket.find({"filename": name}).limit(1):
+        return
+    await avatar_bucket.upload_from_stream(name, content, metadata={"contentType": content_type})
+
+
+async def save_avatar(data: str) -> str:
+    """
+    Stores an uploaded avatar in the blob store and returns the url to keep on the user.
+    """
+    content, content_type = decode_avatar(data)
+    digest = hashlib.sha256(content).hexdigest()
+    await store_avatar_blob(digest, content, content_type)
+    return f"{AVATAR_URL_PREFIX}{digest}"
+
+
+def make_thumbnail(content: bytes, size: int) -> tuple[bytes, str] | None:
+    try:
+        from PIL import Image
+    except ImportError:
+        #thumbnails need the optional pillow package, callers fall back to the original
+        return None
+    from io import BytesIO
+
+    with Image.open(BytesIO(content)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        output = BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue(), "image/png"
+
+
+async def migrate_inline_avatars(batch_size: int = 100) -> int:
+    """
+    Moves avatars that are still stored inline on user documents into the blob store.
+    Safe to re-run, users that already point at a blob are skipped by the query.
+    Values that do not decode as an image (e.g. external urls) are left as they are.
+    """
+    moved = 0
+    query = {"avatar": {"$type": "string", "$not": {"$regex": f"^{AVATAR_URL_PREFIX}"}}}
+    async for user in users_collection.find(query, {"avatar": 1}).batch_size(batch_size):
+        try:
+            url = await save_avatar(user["avatar"])
+        except HTTPException:
+            logger.warning("Leaving undecodable inline avatar in place for user %s", user["_id"])
+            continue
+        await users_collection.update_one(
+            {"_id": user["_id"], "avatar": user["avatar"]},
+            bump_version({"$set": {"avatar": url}}),
+        )
+        moved += 1
+    if moved:
+        logger.info("Moved %s inline avatars to the blob store", moved)
+    return moved
+
+USER_MIGRATION_BATCH_SIZE = int(os.getenv("USER_MIGRATION_BATCH_SIZE", "500"))
+#pause between batches so the migration does not starve request traffic
+USER_MIGRATION_PAUSE_MS = float(os.getenv("USER_MIGRATION_PAUSE_MS", "50"))
+#times a user written to mid-batch is re-read and re-migrated before the run gives up on them
+USER_MIGRATION_RETRIES = int(os.getenv("USER_MIGRATION_RETRIES", "3"))
+#only the worker holding the lease migrates, it is renewed on every batch
+USER_MIGRATION_LEASE_SECONDS = float(os.getenv("USER_MIGRATION_LEASE_SECONDS", "60"))
+
+
+class UserSchemaMigration:
+    """
+    Background job that rewrites user documents at USER_SCHEMA_VERSION in _id order,
+    one bulk_write per batch. The last _id written is checkpointed in the migrations
+    collection, so a restart carries on where the previous process stopped. The
+    checkpoint also carries a lease, so with several workers only one of them migrates.
+    """
+
+    def __init__(self, batch_size: int, pause: float):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.key = f"users-schema-v{USER_SCHEMA_VERSION}"
+        self.progress: dict = {"state": "idle"}
+        self.pending_query = {"schemaVersion": {"$ne": USER_SCHEMA_VERSION}}
+        self.projection = {
+            "points": 1,
+            "streakSaves": 1,
+            "skillLevel": 1,
+            "version": 1,
+            **USER_FIELDS_LESSONS,
+            **USER_FIELDS_ROOM,
+        }
+
+    @staticmethod
+    def upgrade(user: dict) -> dict:
+        return bump_version(
+            {
+                "$set": {
+                    "points": int(user.get("points", 0)),
+                    "streakSaves": int(user.get("streakSaves", 0)),
+                    "skillLevel": user.get("skillLevel"),
+                    "completedMask": completed_lesson_mask(user),
+                    "room": user["room"] if room_is_current(user) else encode_room(room_items_for(user)),
+                    "schemaVersion": USER_SCHEMA_VERSION,
+                },
+                "$unset": {"completedLessons": "", "roomItems": ""},
+            }
+        )
+
+    async def claim(self, token: ObjectId) -> dict | None:
+        now = datetime.now(timezone.utc)
+        try:
+            return await migrations_collection.find_one_and_update(
+                {
+                    "_id": self.key,
+                    "done": {"$ne": True},
+                    "$or": [{"lease": {"$exists": False}}, {"lease.until": {"$lt": now}}],
+                },
+                {"$set": {"lease": {"token": token, "until": now + timedelta(seconds=USER_MIGRATION_LEASE_SECONDS)}}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            #the checkpoint exists but is leased or finished, the upsert collided with it
+            return None
+
+    async def migrate(self, users: list[dict]) -> tuple[int, int, list]:
+        """
+        Upgrades a batch guarded on version. Users written to since they were read are
+        re-read and upgraded again, up to USER_MIGRATION_RETRIES times; returns
+        (migrated, retried, ids still pending).
+        """
+        migrated = retried = 0
+        for attempt in range(USER_MIGRATION_RETRIES + 1):
+            result = await users_collection.bulk_write(
+                [UpdateOne({"_id": user["_id"], "version": user.get("version")}, self.upgrade(user)) for user in users],
+                ordered=False,
+            )
+            migrated += result.modified_count
+            if result.matched_count == len(users):
+                return migrated, retried, []
+            users = await users_collection.find(
+                {"_id": {"$in": [user["_id"] for user in users]}, **self.pending_query}, self.projection
+            ).to_list()
+            if not users:
+                return migrated, retried, []
+            if attempt < USER_MIGRATION_RETRIES:
+                retried += len(users)
+        return migrated, retried, [user["_id"] for user in users]
+
+    async def run(self) -> dict:
+        checkpoint = await migrations_collection.find_one({"_id": self.key}) or {}
+        if checkpoint.get("done"):
+            self.progress = {"state": "done", "migrated": checkpoint.get("migrated", 0)}
+            return self.progress
+
+        token = ObjectId()
+        checkpoint = await self.claim(token)
+        if checkpoint is None:
+            self.progress = {"state": "leased"}
+            return self.progress
+
+        last_id = checkpoint.get("lastId")
+        started = time.monotonic()
+        self.progress = {
+            "state": "running",
+            "remaining": await users_collection.count_documents(self.pending_query),
+            "scanned": 0,
+            "migrated": int(checkpoint.get("migrated", 0)),
+            "retried": 0,
+            "conflicts": 0,
+        }
+        lease = {"_id": self.key, "lease.token": token}
+
+        while True:
+            query = dict(self.pending_query)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await users_collection.find(query, self.projection).sort("_id", ASCENDING).limit(self.batch_size).to_list()
+            if not batch:
+                break
+            migrated, retried, unresolved = await self.migrate(batch)
+            last_id = batch[-1]["_id"]
+            progress = self.progress
+            progress["scanned"] += len(batch)
+            progress["migrated"] += migrated
+            progress["retried"] += retried
+            progress["conflicts"] += len(unresolved)
+            elapsed = time.monotonic() - started
+            progress["docsPerSecond"] = round(progress["scanned"] / elapsed, 1) if elapsed else 0.0
+            renewed = await migrations_collection.update_one(
+                lease,
+                {
+                    "$set": {
+                        "lastId": last_id,
+                        "migrated": progress["migrated"],
+                        "lease.until": datetime.now(timezone.utc) + timedelta(seconds=USER_MIGRATION_LEASE_SECONDS),
+                        "updatedAt": datetime.now(timezone.utc),
+                    }
+                },
+            )
+            if not renewed.matched_count:
+                #lease expired and another worker took over from our last checkpoint
+                progress["state"] = "leased"
+                logger.warning("User schema migration lost its lease after %s users", progress["scanned"])
+                return progress
+            logger.info(
+                "User schema migration: %s/%s scanned, %s migrated, %.1f docs/s",
+                progress["scanned"],
+                progress["remaining"],
+                progress["migrated"],
+                progress["docsPerSecond"],
+            )
+            await asyncio.sleep(self.pause)
+
+        #users still conflicting after every retry are behind the checkpoint, start over next time
+        done = self.progress["conflicts"] == 0
+        await migrations_collection.update_one(
+            lease,
+            {
+                "$set": {"done": done, "lastId": None if not done else last_id, "updatedAt": datetime.now(timezone.utc)},
+                "$unset": {"lease": ""},
+            },
+        )
+        self.progress["state"] = "done" if done else "incomplete"
+        self.progress["durationSeconds"] = round(time.monotonic() - started, 3)
+        if self.progress["scanned"]:
+            logger.info("User schema migration %s: %s", self.progress["state"], self.progress)
+        return self.progress
+
+
+user_migration = UserSchemaMigration(USER_MIGRATION_BATCH_SIZE, USER_MIGRATION_PAUSE_MS / 1000)
+
+
 #adding a user
 @app.post(
     "/users/",
@@ -703,14 +2786,25 @@ async def register_user(user: UserModel):
             detail="A user with that email or username already exists.",
         )
 
-    new_user = user.model_dump(by_alias=True, exclude=["id"])
+    new_user = user.model_dump(by_alias=True, exclude=["id", "stale"])
     new_user["email"] = normalized_email
     new_user.setdefault("streakSaves", 0)
     new_user.setdefault("skillLevel", None)
-    new_user["completedLessons"] = []
-    new_user["roomItems"] = default_room_items()
-    result = await users_collection.insert_one(new_user)
+    new_user.pop("completedLessons", None)
+    new_user["completedMask"] = 0
+    new_user.pop("roomItems", None)
+    new_user["room"] = encode_room(default_room_items())
+    new_user["schemaVersion"] = USER_SCHEMA_VERSION
+    try:
+        result = await users_collection.insert_one(new_user)
+    except DuplicateKeyError:
+        #a concurrent registration got past the check above, the unique index caught it
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with that email or username already exists.",
+        )
     new_user["_id"] = str(result.inserted_id)
+    points_leaderboard.track(new_user)
 
     return ensure_user_defaults(new_user)
 
@@ -737,12 +2831,21 @@ async def register_user(user: UserModel):
     response_model=UserModel,
     response_model_by_alias=False,
 )
-async def get_user(id: str):
+async def get_user(id: str, request: Request, response: Response):
+    #cheap version lookup first, polling clients with a current ETag get a 304 and no body
+    current = await find_user(id, USER_FIELDS_VERSION)
+    if current is None:
+        raise HTTPException(status_code=404, detail=f"User {id} not found")
+    etag = document_etag(id, current.get("version"))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     if (
         user := await users_collection.find_one({"_id": ObjectId(id)})
     ) is not None:
+        set_etag(response, document_etag(id, user.get("version")))
         user["_id"] = str(user["_id"])
-        return ensure_user_defaults(user)
+        return render_trusted(UserModel, ensure_user_defaults(user), response)
     
     raise HTTPException(status_code=404, detail=f"User {id} not found")
 
@@ -763,7 +2866,7 @@ async def login_user(credentials: LoginRequest):
         )
 
     user["_id"] = str(user["_id"])
-    return ensure_user_defaults(user)
+    return render_trusted(UserModel, ensure_user_defaults(user))
 
 #updating a user
 #can be used for updating settings
@@ -779,18 +2882,38 @@ async def update_user(id: str, user: UpdateUserModel):
         k: v for k, v in user.model_dump(by_alias=True).items() if v is not None
     }
     avatar_data = user.get("avatar")
-    if avatar_data and len(avatar_data) > 8_000_000:
+    if avatar_data and len(avatar_data) > AVATAR_MAX_CHARS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Avatar is too large. Please upload an image under 5MB.",
         )
+    if avatar_data and not avatar_data.startswith(AVATAR_URL_PREFIX):
+        #the image goes to the blob store, the user document only keeps its url
+        user["avatar"] = await save_avatar(avatar_data)
+    unset: dict = {}
+    if "completedLessons" in user or "skillLevel" in user:
+        #completion is stored as a bitmask over the (possibly new) track
+        current = await find_user(id, USER_FIELDS_LESSONS) or {}
+        skill_level = user.get("skillLevel", current.get("skillLevel"))
+        completed = user.pop("completedLessons", None)
+        if completed is None:
+            completed = completed_lesson_ids(current)
+        user["completedMask"] = get_lesson_table(skill_level).mask_for(completed)
+        unset["completedLessons"] = ""
     if len(user) >= 1:
-        update_result = await users_collection.find_one_and_update(
-            {"_id": ObjectId(id)},
-            {"$set": user},
-            return_document=ReturnDocument.AFTER,
-        )
+        try:
+            update_result = await users_collection.find_one_and_update(
+                {"_id": ObjectId(id)},
+                bump_version({"$set": user, **({"$unset": unset} if unset else {})}),
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A user with that email or username already exists.",
+            )
         if update_result is not None:
+            points_leaderboard.track(update_result)
             return ensure_user_defaults(update_result)
         else:
             raise HTTPException(status_code=404, detail=f"User {id} not found")
@@ -800,6 +2923,45 @@ async def update_user(id: str, user: UpdateUserModel):
     
     raise HTTPException(status_code=404, detail=f"User {id} not found")
 
+@app.get(
+    "/avatars/{avatar_hash}",
+    response_description="Get an avatar image (optionally as a square thumbnail)",
+    response_class=Response,
+)
+async def get_avatar(avatar_hash: str, request: Request, size: int | None = None):
+    if len(avatar_hash) != 64 or any(c not in "0123456789abcdef" for c in avatar_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    if size is not None and size not in AVATAR_THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"size must be one of {', '.join(str(s) for s in AVATAR_THUMBNAIL_SIZES)}",
+        )
+
+    #the bytes behind a hash never change, so the etag can be strong and the cache immutable
+    name = f"{avatar_hash}-{size}" if size else avatar_hash
+    headers = {"ETag": f'"{name}"', "Cache-Control": AVATAR_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    blob = await find_avatar_blob(name)
+    if blob is None and size:
+        original = await find_avatar_blob(avatar_hash)
+        if original is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+        blob = await asyncio.to_thread(make_thumbnail, original[0], size)
+        if blob is None:
+            #no thumbnailer available, serve the original under its own etag
+            name = avatar_hash
+            headers["ETag"] = f'"{name}"'
+            blob = original
+        else:
+            await store_avatar_blob(name, *blob)
+    if blob is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+
+    content, content_type = blob
+    return Response(content=content, media_type=content_type, headers=headers)
+
 #this updates a user document based on the user id (data.id) and
 #lc_username
 @app.put(
@@ -812,7 +2974,10 @@ async def update_leetcode_stats(data: LeetCodeUpdateRequest):
     id = data.id
     lc_username = data.lcUsername
 
-    solved = fetch_leetcode_profile(lc_username)
+    try:
+        solved = await fetch_leetcode_profile(lc_username)
+    except LeetCodeUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=LEETCODE_UNAVAILABLE_DETAIL)
 
     if solved is None:
         raise HTTPException(status_code=404, detail=f"LeetCode user {lc_username} not found")
@@ -825,7 +2990,7 @@ async def update_leetcode_stats(data: LeetCodeUpdateRequest):
 
     update_result = await users_collection.update_one(
         {"_id": ObjectId(id)},
-        {"$set": {"lcUsername": lc_username}},
+        bump_version({"$set": {"lcUsername": lc_username}}),
     )
 
     if update_result.matched_count == 0:
@@ -837,6 +3002,22 @@ async def update_leetcode_stats(data: LeetCodeUpdateRequest):
     }
 
 
+@app.get(
+    "/leetcode/cache-stats",
+    response_description="LeetCode profile cache hit/miss counters",
+)
+async def get_profile_cache_stats():
+    return profile_cache.stats()
+
+
+@app.get(
+    "/leetcode/upstream-stats",
+    response_description="LeetCode circuit breaker and rate limiter state",
+)
+async def get_upstream_stats():
+    return leetcode_client.stats()
+
+
 @app.get(
     "/users/{id}/refresh-points",
     response_description="Refresh a user's points from their linked LeetCode profile",
@@ -855,40 +3036,43 @@ async def refresh_user_points(id: str):
             detail="User has not linked a LeetCode profile.",
         )
 
-    profile = fetch_leetcode_profile(lc_username)
+    try:
+        profile = await fetch_leetcode_profile(lc_username)
+    except LeetCodeUnavailable:
+        #serve what we already have instead of hanging on an upstream that is refusing us
+        user["_id"] = str(user["_id"])
+        user["stale"] = True
+        return ensure_user_defaults(user)
     if profile is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"LeetCode user {lc_username} not found")
 
-    await award_user_points(user, profile)
-
-    refreshed_user = await users_collection.find_one({"_id": ObjectId(id)})
+    _, refreshed_user = await award_user_points(user, profile)
     if not refreshed_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found after refresh")
 
     refreshed_user["_id"] = str(refreshed_user["_id"])
-    return ensure_user_defaults(refreshed_user)
+    return render_trusted(UserModel, ensure_user_defaults(refreshed_user))
 
 
 @app.put(
     "/users/{id}/skill-level",
     response_description="Set a user's skill level and reset lesson progress",
-    response_model=UserModel,
+    response_model=UserModel | SkillLevelResponse,
     response_model_by_alias=False,
 )
-async def set_skill_level(id: str, payload: SkillLevelRequest):
-    user = await users_collection.find_one({"_id": ObjectId(id)})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
-
-    updated = await users_collection.find_one_and_update(
-        {"_id": ObjectId(id)},
-        {"$set": {"skillLevel": payload.skillLevel, "completedLessons": []}},
-        return_document=ReturnDocument.AFTER,
+async def set_skill_level(id: str, payload: SkillLevelRequest, view: Literal["full", "slim"] = "full"):
+    #view=slim only returns the new skill level and (reset) lesson list
+    updated = await update_user_document(
+        id,
+        {"$set": {"skillLevel": payload.skillLevel, "completedMask": 0}, "$unset": {"completedLessons": ""}},
+        fields=USER_FIELDS_LESSONS if view == "slim" else None,
     )
 
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
 
+    if view == "slim":
+        return {"skillLevel": updated["skillLevel"], "completedLessons": completed_lesson_ids(updated)}
     updated["_id"] = str(updated["_id"])
     return ensure_user_defaults(updated)
 
@@ -899,19 +3083,30 @@ async def set_skill_level(id: str, payload: SkillLevelRequest):
     response_model=LessonCompleteResponse,
     response_model_by_alias=False,
 )
-async def get_lessons(id: str):
-    user = await users_collection.find_one({"_id": ObjectId(id)})
+async def get_lessons(id: str, request: Request, response: Response):
+    current = await find_user(id, USER_FIELDS_VERSION)
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+    etag = document_etag(id, current.get("version"))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    user = await find_user(id, {**USER_FIELDS_LESSONS, "version": 1})
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+    set_etag(response, document_etag(id, user.get("version")))
 
-    user = ensure_user_defaults(user)
     payload = build_lesson_progress(user)
 
-    return {
-        **payload,
-        "points": int(user.get("points", 0)),
-        "pointsAwarded": 0,
-    }
+    return render_trusted(
+        LessonCompleteResponse,
+        {
+            **payload,
+            "points": int(user.get("points", 0)),
+            "pointsAwarded": 0,
+        },
+        response,
+    )
 
 
 @app.post(
@@ -921,58 +3116,58 @@ async def get_lessons(id: str):
     response_model_by_alias=False,
 )
 async def complete_lesson(id: str, lesson_id: str):
-    user = await users_collection.find_one({"_id": ObjectId(id)})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
-
-    user = ensure_user_defaults(user)
-    track = get_lesson_track(user.get("skillLevel"))
-    lesson_meta = next((lesson for lesson in track if lesson["id"] == lesson_id), None)
-    if not lesson_meta:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lesson not found for this track.")
-
-    completed = set(user.get("completedLessons") or [])
+    #one round trip in the common case: the filter only matches if the lesson belongs to the
+    #user's track and its bit is not set yet, and $bit/$inc make double submits from several tabs harmless.
+    #lesson ids are unique across tracks today, so this loop runs once
     points_awarded = 0
-    if lesson_id not in completed:
-        completed.add(lesson_id)
-        points_awarded = LESSON_POINT_VALUE
-        new_points = int(user.get("points", 0)) + points_awarded
-        await users_collection.update_one(
-            {"_id": ObjectId(id)},
-            {"$set": {"completedLessons": list(completed), "points": new_points}},
+    refreshed_user = None
+    for position, levels in lesson_positions(lesson_id).items():
+        bit = 1 << position
+        refreshed_user = await update_user_document(
+            id,
+            {"$bit": {"completedMask": {"or": bit}}, "$inc": {"points": LESSON_POINT_VALUE}},
+            fields=USER_FIELDS_LESSONS,
+            conditions={
+                "skillLevel": {"$in": levels},
+                "completedLessons": {"$ne": lesson_id},
+                "$or": [{"completedMask": {"$bitsAllClear": bit}}, {"completedMask": {"$exists": False}}],
+            },
         )
+        if refreshed_user is not None:
+            break
+    if refreshed_user is not None:
+        points_awarded = LESSON_POINT_VALUE
+        points_leaderboard.track(refreshed_user)
     else:
-        await users_collection.update_one(
-            {"_id": ObjectId(id)},
-            {"$set": {"completedLessons": list(completed)}},
-        )
+        #nothing was written: find out whether the user is missing, on another track or already done
+        refreshed_user = await find_user(id, USER_FIELDS_LESSONS)
+        if not refreshed_user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+        if lesson_id not in get_lesson_table(refreshed_user.get("skillLevel")).positions:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lesson not found for this track.")
 
-    refreshed_user = await users_collection.find_one({"_id": ObjectId(id)})
-    if not refreshed_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found after completion")
-
-    refreshed_user["_id"] = str(refreshed_user["_id"])
-    refreshed_user = ensure_user_defaults(refreshed_user)
     payload = build_lesson_progress(refreshed_user)
 
-    return {
-        **payload,
-        "points": int(refreshed_user.get("points", 0)),
-        "pointsAwarded": points_awarded,
-    }
+    return render_trusted(
+        LessonCompleteResponse,
+        {
+            **payload,
+            "points": int(refreshed_user.get("points", 0)),
+            "pointsAwarded": points_awarded,
+        },
+    )
 
 
 @app.post(
     "/users/{id}/streak-saves",
     response_description="Purchase streak saves with points",
-    response_model=UserModel,
+    response_model=UserModel | WalletResponse,
     response_model_by_alias=False,
 )
-async def purchase_streak_saves(id: str, purchase: PurchaseStreakSaveRequest):
-    user = await users_collection.find_one({"_id": ObjectId(id)})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
-
+async def purchase_streak_saves(
+    id: str, purchase: PurchaseStreakSaveRequest, view: Literal["full", "slim"] = "full"
+):
+    #view=slim only returns the new balances and what changed, not the whole user
     cost = STREAK_SAVE_PRICING.get(purchase.count)
     if cost is None:
         raise HTTPException(
@@ -980,18 +3175,30 @@ async def purchase_streak_saves(id: str, purchase: PurchaseStreakSaveRequest):
             detail="Unsupported streak save quantity.",
         )
 
-    updated = await users_collection.find_one_and_update(
-        {"_id": ObjectId(id), "points": {"$gte": cost}},
+    updated = await update_user_document(
+        id,
         {"$inc": {"points": -cost, "streakSaves": purchase.count}},
-        return_document=ReturnDocument.AFTER,
+        fields=USER_FIELDS_WALLET if view == "slim" else None,
+        conditions={"points": {"$gte": cost}},
     )
 
     if updated is None:
+        #only look the user up on the failure path to tell "missing" from "too poor"
+        if await find_user(id, USER_FIELDS_ID) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enough points to buy streak saves.",
         )
 
+    points_leaderboard.track(updated)
+    if view == "slim":
+        return {
+            "points": int(updated.get("points", 0)),
+            "streakSaves": int(updated.get("streakSaves", 0)),
+            "pointsDelta": -cost,
+            "streakSavesDelta": purchase.count,
+        }
     updated["_id"] = str(updated["_id"])
     return ensure_user_defaults(updated)
 
@@ -1013,48 +3220,41 @@ async def purchase_room_item(id: str, purchase: RoomPurchaseRequest):
             detail="Starter items cannot be purchased.",
         )
 
-    user = await users_collection.find_one({"_id": ObjectId(id)})
-    if not user:
+    if await load_room(id, USER_FIELDS_ID) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
 
-    user = ensure_user_defaults(user)
-    room_items = normalize_room_items(user.get("roomItems"))
+    #ownership, placement, the catalog position and the points all change in one conditional update
+    position = ROOM_POSITIONS[item_id]
+    bit = 1 << position
+    cost = int(item_meta.get("cost", 0))
+    updated = await update_user_document(
+        id,
+        {
+            "$bit": {"room.owned": {"or": bit}, "room.placed": {"or": bit}},
+            "$set": {
+                f"room.xy.{2 * position}": pack_percent(item_meta.get("x", 50.0)),
+                f"room.xy.{2 * position + 1}": pack_percent(item_meta.get("y", 50.0)),
+            },
+            "$inc": {"points": -cost},
+        },
+        conditions={"room.owned": {"$bitsAllClear": bit}, "points": {"$gte": cost}},
+    )
 
-    for item in room_items:
-        if item["id"] == item_id and item.get("owned"):
+    if updated is None:
+        user = await find_user(id, {"room.owned": 1})
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+        if int(user.get("room", {}).get("owned", 0)) & bit:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You already own this item.",
             )
-
-    updated_room = []
-    for item in room_items:
-        if item["id"] == item_id:
-            updated_room.append(
-                {
-                    **item,
-                    "owned": True,
-                    "placed": True,
-                    "x": clamp_percent(item_meta.get("x", item.get("x", 50.0))),
-                    "y": clamp_percent(item_meta.get("y", item.get("y", 50.0))),
-                }
-            )
-        else:
-            updated_room.append(item)
-
-    cost = int(item_meta.get("cost", 0))
-    updated = await users_collection.find_one_and_update(
-        {"_id": ObjectId(id), "points": {"$gte": cost}},
-        {"$set": {"roomItems": updated_room}, "$inc": {"points": -cost}},
-        return_document=ReturnDocument.AFTER,
-    )
-
-    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enough points to buy this item.",
         )
 
+    points_leaderboard.track(updated)
     updated["_id"] = str(updated["_id"])
     return ensure_user_defaults(updated)
 
@@ -1066,35 +3266,17 @@ async def purchase_room_item(id: str, purchase: RoomPurchaseRequest):
     response_model_by_alias=False,
 )
 async def save_room_layout(id: str, payload: RoomItemsPayload):
-    user = await users_collection.find_one({"_id": ObjectId(id)})
+    user = await load_room(id, USER_FIELDS_ID)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
 
-    user = ensure_user_defaults(user)
-    room_items = normalize_room_items(user.get("roomItems"))
-    incoming = {item.id: item for item in payload.items if item.id in ROOM_CATALOG}
-
-    updated_room: list[dict] = []
-    for item in room_items:
-        candidate = incoming.get(item["id"])
-        if candidate and item.get("owned"):
-            updated_room.append(
-                {
-                    "id": item["id"],
-                    "owned": True,
-                    "placed": bool(candidate.placed),
-                    "x": clamp_percent(candidate.x if candidate.x is not None else item.get("x", 50.0)),
-                    "y": clamp_percent(candidate.y if candidate.y is not None else item.get("y", 50.0)),
-                }
-            )
-        else:
-            updated_room.append(item)
-
-    updated = await users_collection.find_one_and_update(
-        {"_id": ObjectId(id)},
-        {"$set": {"roomItems": updated_room}},
-        return_document=ReturnDocument.AFTER,
-    )
+    changes = {
+        ROOM_POSITIONS[item.id]: {"placed": item.placed, "x": item.x, "y": item.y}
+        for item in payload.items
+        if item.id in ROOM_POSITIONS
+    }
+    #only the items in the payload are written: their placed bits and their own coordinate slots
+    updated = await update_user_document(id, room_layout_update(user["room"], changes))
 
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
@@ -1102,6 +3284,139 @@ async def save_room_layout(id: str, payload: RoomItemsPayload):
     updated["_id"] = str(updated["_id"])
     return ensure_user_defaults(updated)
 
+
+@app.patch(
+    "/users/{id}/room",
+    response_description="Move or (un)place some room items",
+    response_model=RoomPatchResponse,
+)
+async def patch_room_layout(id: str, payload: RoomPatchPayload):
+    #only the items that changed, patches from the same tab within ROOM_PATCH_COALESCE_MS share one write
+    changes = {
+        ROOM_POSITIONS[item.id]: item.model_dump(exclude={"id"}, exclude_none=True)
+        for item in payload.items
+        if item.id in ROOM_POSITIONS
+    }
+    result = await room_patch_coalescer.submit(id, payload.clientId, payload.seq, changes)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+    return result
+
+
+@app.get(
+    "/streaks/last-run",
+    response_description="Summary of the last daily streak evaluation",
+)
+async def get_streak_run():
+    return streak_evaluator.last_run
+
+
+@app.get(
+    "/migrations/users",
+    response_description="Progress of the background user schema migration",
+)
+async def get_user_migration_progress():
+    return user_migration.progress
+
+
+@app.get(
+    "/room/patch-stats",
+    response_description="Room patch coalescing counters",
+)
+async def get_room_patch_stats():
+    return room_patch_coalescer.stats()
+
+
+@app.get(
+    "/leaderboard",
+    response_description="Top users by points",
+    response_model=list[LeaderboardEntry],
+)
+async def get_leaderboard(limit: int = Query(default=10, ge=1, le=100)):
+    return points_leaderboard.top(limit)
+
+
+@app.get(
+    "/leaderboard/{id}",
+    response_description="A user's global rank and the users around them",
+    response_model=LeaderboardPosition,
+)
+async def get_leaderboard_position(id: str, neighbours: int = Query(default=2, ge=0, le=25)):
+    position = points_leaderboard.around(id, neighbours)
+    if position is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {id} not found")
+    return position
+
+TOURNAMENT_LIST_MAX = 1000
+TOURNAMENT_PAGE_MAX = 100
+TOURNAMENT_BREAKDOWN_FIELDS = [
+    f"{prefix}{difficulty}Solved"
+    for prefix in ("initial", "current")
+    for difficulty in ("Easy", "Medium", "Hard")
+]
+TOURNAMENT_SUMMARY_PROJECTION = {f"participants.{field}": 0 for field in TOURNAMENT_BREAKDOWN_FIELDS}
+
+
+def encode_tournament_cursor(tournament_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(ObjectId(tournament_id).binary).decode().rstrip("=")
+
+
+def decode_tournament_cursor(cursor: str) -> ObjectId:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return ObjectId(raw)
+    except (binascii.Error, InvalidId, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+
+def build_tournament_query(user_id: str | None, scope: str, after: str | None) -> dict:
+    query: dict = {}
+    if user_id:
+        query["participants.id"] = user_id
+    #startTime/endTime are stored as utc isoformat strings, so they compare correctly as strings
+    now = datetime.now(timezone.utc).isoformat()
+    if scope == "active":
+        query["endTime"] = {"$gt": now}
+    elif scope == "ended":
+        query["endTime"] = {"$lte": now}
+    #pages run newest first, so the cursor is the oldest _id already sent
+    if after:
+        query["_id"] = {"$lt": decode_tournament_cursor(after)}
+    return query
+
+
+TOURNAMENT_STREAM_BATCH_SIZE = 200
+
+
+async def stream_tournaments(query: dict, projection: dict | None):
+    """
+    Walks the cursor in batches and yields one serialized tournament per line,
+    so memory stays flat and the first line goes out before the query finishes.
+    """
+    cursor = (
+        tournaments_collection.find(query, projection)
+        .sort("_id", -1)
+        .batch_size(TOURNAMENT_STREAM_BATCH_SIZE)
+    )
+    async for tournament in cursor:
+        #same shape as the json list response
+        yield orjson.dumps(project_trusted(TournamentModel, serialize_tournament(tournament))) + b"\n"
+
+
+def tournament_list_etag(tournaments: list[dict]) -> str:
+    digest = hashlib.sha1(
+        ",".join(f"{tournament['_id']}:{int(tournament.get('version') or 0)}" for tournament in tournaments).encode()
+    ).hexdigest()
+    #weak: lastRefreshed can move without a version bump
+    return f'W/"{digest}"'
+
+
+def summarize_tournament(tournament: dict) -> dict:
+    for participant in tournament.get("participants", []):
+        for field in TOURNAMENT_BREAKDOWN_FIELDS:
+            participant.pop(field, None)
+    return tournament
+
 #creating a new tourny. a tourny has a name, pass, start time, end time
 # and the participants
 @app.post(
@@ -1124,7 +3439,10 @@ async def create_tournament(tournament: CreateTournamentRequest):
     if not creator.get("lcUsername"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Link your LeetCode account first.")
 
-    fresh_profile = fetch_leetcode_profile(creator["lcUsername"])
+    try:
+        fresh_profile = await fetch_leetcode_profile(creator["lcUsername"])
+    except LeetCodeUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=LEETCODE_UNAVAILABLE_DETAIL)
     if fresh_profile is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unable to fetch LeetCode profile.")
 
@@ -1143,10 +3461,16 @@ async def create_tournament(tournament: CreateTournamentRequest):
         "endTime": end_time.isoformat(),
         "participants": [creator_participant],
         "streak": 0,
-        "lastChecked": None,
+        #the first check is at the next rollover and judges the (partial) creation day
+        "lastChecked": start_time.date().isoformat(),
     }
 
-    result = await tournaments_collection.insert_one(new_tournament)
+    try:
+        result = await tournaments_collection.insert_one(new_tournament)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="A tournament with that name already exists."
+        )
     new_tournament["_id"] = result.inserted_id
 
     return serialize_tournament(new_tournament)
@@ -1158,14 +3482,71 @@ async def create_tournament(tournament: CreateTournamentRequest):
     response_model=list[TournamentModel],
     response_model_by_alias=False,
 )
-async def list_tournaments(userId: str | None = None):
-    query = {}
-    if userId:
-        query = {"participants.id": userId}
-    tournaments = await tournaments_collection.find(query).to_list(length=1000)
+async def list_tournaments(
+    request: Request,
+    response: Response,
+    userId: str | None = None,
+    fresh: bool = False,
+    scope: Literal["all", "active", "ended", "mine"] = "all",
+    view: Literal["full", "summary"] = "full",
+    limit: int | None = Query(default=None, ge=1, le=TOURNAMENT_PAGE_MAX),
+    after: str | None = None,
+    stream: bool = False,
+):
+    #standings are kept up to date by tournament_scheduler, so this is a plain read
+    #unless the caller explicitly asks for a fresh refresh
+    #pass limit (and the X-Next-Cursor header back as after) to page through the results
+    #or stream=true to get every match as ndjson without building the list in memory
+    if scope == "mine" and not userId:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="scope=mine needs a userId.")
+
+    query = build_tournament_query(userId, scope, after)
+    if stream:
+        #the whole matching set as ndjson, one tournament per line straight off the cursor
+        projection = TOURNAMENT_SUMMARY_PROJECTION if view == "summary" else None
+        return StreamingResponse(
+            stream_tournaments(query, projection),
+            media_type="application/x-ndjson",
+        )
+
+    page_size = limit or TOURNAMENT_LIST_MAX
+    if not fresh:
+        #the listing only changes when a matching document's version or the set of matches does,
+        #so check that with a narrow query before loading and serializing anything
+        versions = await (
+            tournaments_collection.find(query, {"version": 1})
+            .sort("_id", -1)
+            .limit(page_size + 1)
+            .to_list(length=page_size + 1)
+        )
+        etag = tournament_list_etag(versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+    #refreshing needs the full participant documents, the breakdown is stripped afterwards
+    projection = TOURNAMENT_SUMMARY_PROJECTION if view == "summary" and not fresh else None
+    cursor = tournaments_collection.find(query, projection).sort("_id", -1).limit(page_size + 1)
+    tournaments = await cursor.to_list(length=page_size + 1)
+
+    if limit is not None and len(tournaments) > page_size:
+        tournaments = tournaments[:page_size]
+        response.headers["X-Next-Cursor"] = encode_tournament_cursor(tournaments[-1]["_id"])
+    else:
+        tournaments = tournaments[:page_size]
+
+    if not fresh:
+        return render_trusted(
+            TournamentModel, [serialize_tournament(tournament) for tournament in tournaments], response
+        )
+
+    plan = await plan_tournament_refresh(tournaments)
     refreshed: list[dict] = []
     for tournament in tournaments:
-        refreshed.append(await refresh_tournament(tournament))
+        refreshed_tournament = await refresh_tournament(tournament, plan)
+        if view == "summary":
+            refreshed_tournament = summarize_tournament(refreshed_tournament)
+        refreshed.append(refreshed_tournament)
     return refreshed
 
 #adding a new participant to a tournament
@@ -1219,7 +3600,10 @@ async def join_tournament(data: JoinTournamentRequest):
     if any(p.get("id") == data.id for p in tournament.get("participants", [])):
         raise HTTPException(status_code=400, detail="User already joined this tournament.")
 
-    fresh_profile = fetch_leetcode_profile(user["lcUsername"])
+    try:
+        fresh_profile = await fetch_leetcode_profile(user["lcUsername"])
+    except LeetCodeUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=LEETCODE_UNAVAILABLE_DETAIL)
     if fresh_profile is None:
         raise HTTPException(status_code=404, detail=f"LeetCode user {user['lcUsername']} not found")
     await award_user_points(user, fresh_profile)
@@ -1229,7 +3613,7 @@ async def join_tournament(data: JoinTournamentRequest):
     #adding the new participant to Mongo
     update_result = await tournaments_collection.find_one_and_update(
         {"_id": ObjectId(tournament_id)},
-        {"$push": {"participants": participant}},
+        bump_version({"$push": {"participants": participant}}),
         return_document=ReturnDocument.AFTER
     )
 
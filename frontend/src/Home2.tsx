@@ -2,7 +2,7 @@ import { useEffect, useMemo, useState } from 'react'
 import styles from './Home2.module.css'
 import { tracks, type LessonNode } from './Lessons.tsx'
 import type { SkillLevelOption } from './SkillLevel.tsx'
-import { fetchTournaments, type Tournament, type TournamentParticipant } from './api/tournaments'
+import { fetchAllTournaments, type Tournament, type TournamentParticipant } from './api/tournaments'
 import { ApiError, fetchLessons, fetchUser, refreshUserPoints, type LessonTrack } from './api/users'
 import { clearStoredUserId, getStoredUserId } from './session'
 
@@ -166,7 +166,7 @@ function Home2({
     const loadBestTournament = async () => {
       setTourneyLoading(true)
       try {
-        const tournaments = await fetchTournaments(userId)
+        const tournaments = await fetchAllTournaments(userId)
         const best = selectBestTournament(tournaments, userId)
         setBestTournament(best)
       } catch (error) {
@@ -10,7 +10,7 @@ import rubberDuckImg from '../images/rubberduck.png'
 import rugImg from '../images/rug.png'
 import sinkImg from '../images/sink.png'
 import speakerImg from '../images/speaker.png'
-import { ApiError, fetchUser, purchaseRoomItem, saveRoomLayout, type RoomItemState } from './api/users'
+import { ApiError, fetchUser, patchRoomLayout, purchaseRoomItem, type RoomItemState } from './api/users'
 import { getStoredUserId } from './session'
 
 type RoomProps = {
@@ -150,8 +150,16 @@ const hydrateRoomItems = (roomItems?: RoomItemState[]): RoomItem[] => {
   })
 }
 
-const toPayload = (items: RoomItem[]): RoomItemState[] =>
-  items.map((item) => ({ id: item.id, owned: item.owned, placed: item.placed, x: item.x, y: item.y }))
+// only the owned items whose placement or position differs from what the server last confirmed
+const changedItems = (items: RoomItem[], saved: RoomItem[]): Partial<RoomItemState>[] => {
+  const savedById = new Map(saved.map((item) => [item.id, item]))
+  return items
+    .filter((item) => {
+      const before = savedById.get(item.id)
+      return item.owned && (!before || before.placed !== item.placed || before.x !== item.x || before.y !== item.y)
+    })
+    .map((item) => ({ id: item.id, placed: item.placed, x: item.x, y: item.y }))
+}
 
 const clampPercent = (value: number) => Math.min(100, Math.max(0, value))
 
@@ -177,6 +185,8 @@ function Room({
   const [dragMoved, setDragMoved] = useState(false)
   const sceneRef = useRef<HTMLDivElement | null>(null)
   const itemsRef = useRef<RoomItem[]>(items)
+  const savedItemsRef = useRef<RoomItem[]>(items)
+  const patchSeqRef = useRef(0)
 
   const persistLayout = useCallback(
     async (nextItems: RoomItem[]) => {
@@ -184,11 +194,18 @@ function Room({
         setError('Log in to save your layout changes.')
         return
       }
+      const changed = changedItems(nextItems, savedItemsRef.current)
+      if (changed.length === 0) return
+      const seq = ++patchSeqRef.current
       setSaving(true)
       try {
-        const updated = await saveRoomLayout(userId, toPayload(nextItems))
-        setPoints(typeof updated.points === 'number' ? updated.points : points)
-        setItems(hydrateRoomItems(updated.roomItems))
+        const updated = await patchRoomLayout(userId, changed, seq)
+        // a later patch is already on its way, its response will carry the newer layout
+        if (updated.seq >= patchSeqRef.current) {
+          const hydrated = hydrateRoomItems(updated.roomItems)
+          savedItemsRef.current = hydrated
+          setItems(hydrated)
+        }
         setError(null)
       } catch (err) {
         if (err instanceof ApiError) {
@@ -200,7 +217,7 @@ function Room({
         setSaving(false)
       }
     },
-    [points, userId],
+    [userId],
   )
 
   useEffect(() => {
@@ -213,7 +230,9 @@ function Room({
     try {
       const data = await fetchUser(id)
       setPoints(typeof data.points === 'number' ? data.points : 0)
-      setItems(hydrateRoomItems(data.roomItems))
+      const hydrated = hydrateRoomItems(data.roomItems)
+      savedItemsRef.current = hydrated
+      setItems(hydrated)
     } catch (err) {
       if (err instanceof ApiError && (err.status === 401 || err.status === 404)) {
         setError('Log back in to save your bathroom progress.')
@@ -269,7 +288,9 @@ function Room({
     try {
       const updatedUser = await purchaseRoomItem(userId, id)
       setPoints(typeof updatedUser.points === 'number' ? updatedUser.points : 0)
-      setItems(hydrateRoomItems(updatedUser.roomItems))
+      const hydrated = hydrateRoomItems(updatedUser.roomItems)
+      savedItemsRef.current = hydrated
+      setItems(hydrated)
       setShowShop(false)
       setError(null)
     } catch (err) {
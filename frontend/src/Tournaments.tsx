@@ -85,6 +85,8 @@ function Tournaments({
   const [expandedLadders, setExpandedLadders] = useState<Record<string, boolean>>({})
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   const [createForm, setCreateForm] = useState({ name: '', password: '' })
   const [joinForm, setJoinForm] = useState({ name: '', password: '' })
@@ -107,6 +109,7 @@ function Tournaments({
     setUserName('Player')
     setStreakSaves(0)
     setTournaments([])
+    setNextCursor(null)
     setExpandedLadders({})
   }
 
@@ -162,14 +165,16 @@ function Tournaments({
   const loadTournaments = async () => {
     if (!userId) {
       setTournaments([])
+      setNextCursor(null)
       return
     }
     setLoading(true)
     setError(null)
     try {
-      const data = await fetchTournaments(userId)
-      const normalized = data.map(normalizeTournament)
+      const page = await fetchTournaments(userId)
+      const normalized = page.tournaments.map(normalizeTournament)
       setTournaments(sortByStart(normalized))
+      setNextCursor(page.nextCursor)
       try {
         const updatedUser = await fetchUser(userId)
         setUserPoints(typeof updatedUser.points === 'number' ? updatedUser.points : 0)
@@ -186,6 +191,25 @@ function Tournaments({
     }
   }
 
+  const loadMoreTournaments = async () => {
+    if (!userId || !nextCursor || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const page = await fetchTournaments(userId, { after: nextCursor })
+      const added = page.tournaments.map(normalizeTournament)
+      setTournaments((prev) => {
+        const seen = new Set(prev.map(tournamentKey))
+        return sortByStart([...prev, ...added.filter((t) => !seen.has(tournamentKey(t)))])
+      })
+      setNextCursor(page.nextCursor)
+    } catch (err) {
+      const message = err instanceof Error ? err.message : 'Could not load more tournaments.'
+      setError(message)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   useEffect(() => {
     loadTournaments()
     // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -513,6 +537,16 @@ function Tournaments({
                   })
                 )}
               </div>
+              {nextCursor && (
+                <button
+                  className={styles.ghostButton}
+                  type="button"
+                  onClick={loadMoreTournaments}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'loading...' : 'load more tournaments'}
+                </button>
+              )}
             </section>
           </div>
 
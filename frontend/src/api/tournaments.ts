@@ -6,12 +6,13 @@ export type TournamentParticipant = {
   lcUsername?: string | null
   initialTotalSolved: number
   currentTotalSolved: number
-  initialEasySolved: number
-  currentEasySolved: number
-  initialMediumSolved: number
-  currentMediumSolved: number
-  initialHardSolved: number
-  currentHardSolved: number
+  //left out by view=summary
+  initialEasySolved?: number
+  currentEasySolved?: number
+  initialMediumSolved?: number
+  currentMediumSolved?: number
+  initialHardSolved?: number
+  currentHardSolved?: number
   score: number
   streakSaveUsedOn?: string
 }
@@ -27,6 +28,8 @@ export type Tournament = {
   participants: TournamentParticipant[]
   streak?: number
   lastChecked?: string | null
+  lastRefreshed?: string | null
+  stale?: boolean
 }
 
 type CreateTournamentPayload = {
@@ -59,13 +62,52 @@ async function parseResponse<T>(response: Response): Promise<T> {
   return data as T
 }
 
-export async function fetchTournaments(userId?: string | null): Promise<Tournament[]> {
+export type TournamentPage = {
+  tournaments: Tournament[]
+  //pass back as `after` to get the next page, null on the last one
+  nextCursor: string | null
+}
+
+type FetchTournamentsOptions = {
+  limit?: number
+  after?: string | null
+  //summary drops the per-difficulty counts, totals and scores are still there
+  view?: 'full' | 'summary'
+}
+
+export const TOURNAMENT_PAGE_SIZE = 20
+
+export async function fetchTournaments(
+  userId?: string | null,
+  { limit = TOURNAMENT_PAGE_SIZE, after, view = 'summary' }: FetchTournamentsOptions = {},
+): Promise<TournamentPage> {
   const url = new URL(`${API_BASE_URL}/tournaments/`)
   if (userId) {
     url.searchParams.set('userId', userId)
   }
+  url.searchParams.set('limit', String(limit))
+  url.searchParams.set('view', view)
+  if (after) {
+    url.searchParams.set('after', after)
+  }
   const response = await fetch(url.toString())
-  return parseResponse<Tournament[]>(response)
+  const tournaments = await parseResponse<Tournament[]>(response)
+  return { tournaments, nextCursor: response.headers.get('X-Next-Cursor') }
+}
+
+//walks every page, for callers that need the whole set (e.g. picking the best standing)
+export async function fetchAllTournaments(
+  userId?: string | null,
+  options: Omit<FetchTournamentsOptions, 'after'> = {},
+): Promise<Tournament[]> {
+  const all: Tournament[] = []
+  let after: string | null = null
+  do {
+    const page: TournamentPage = await fetchTournaments(userId, { limit: 100, ...options, after })
+    all.push(...page.tournaments)
+    after = page.nextCursor
+  } while (after)
+  return all
 }
 
 export async function createTournament(payload: CreateTournamentPayload): Promise<Tournament> {
@@ -25,6 +25,7 @@ export type User = {
   roomItems?: RoomItemState[]
   skillLevel?: SkillLevel | null
   completedLessons?: string[]
+  stale?: boolean
 }
 
 export type RoomItemState = {
@@ -81,13 +82,20 @@ export async function refreshUserPoints(userId: string): Promise<User> {
   return parseResponse<User>(response)
 }
 
-export async function purchaseStreakSaves(userId: string, count: number): Promise<User> {
-  const response = await fetch(`${API_BASE_URL}/users/${userId}/streak-saves`, {
+export type WalletUpdate = {
+  points: number
+  streakSaves: number
+  pointsDelta: number
+  streakSavesDelta: number
+}
+
+export async function purchaseStreakSaves(userId: string, count: number): Promise<WalletUpdate> {
+  const response = await fetch(`${API_BASE_URL}/users/${userId}/streak-saves?view=slim`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ count }),
   })
-  return parseResponse<User>(response)
+  return parseResponse<WalletUpdate>(response)
 }
 
 export async function updateUser(userId: string, updates: {
@@ -112,22 +120,39 @@ export async function purchaseRoomItem(userId: string, itemId: string): Promise<
   return parseResponse<User>(response)
 }
 
-export async function saveRoomLayout(userId: string, items: RoomItemState[]): Promise<User> {
+export type RoomPatch = {
+  seq: number
+  applied: boolean
+  roomItems: RoomItemState[]
+}
+
+//one id per page load, the server only orders patches against others from the same client
+const roomClientId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`
+
+//seq only has to increase within this page load
+export async function patchRoomLayout(
+  userId: string,
+  items: Partial<RoomItemState>[],
+  seq: number,
+): Promise<RoomPatch> {
   const response = await fetch(`${API_BASE_URL}/users/${userId}/room`, {
-    method: 'PUT',
+    method: 'PATCH',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ items }),
+    body: JSON.stringify({ clientId: roomClientId, seq, items }),
   })
-  return parseResponse<User>(response)
+  return parseResponse<RoomPatch>(response)
 }
 
-export async function setSkillLevel(userId: string, skillLevel: SkillLevel): Promise<User> {
-  const response = await fetch(`${API_BASE_URL}/users/${userId}/skill-level`, {
+export async function setSkillLevel(
+  userId: string,
+  skillLevel: SkillLevel,
+): Promise<{ skillLevel: SkillLevel; completedLessons: string[] }> {
+  const response = await fetch(`${API_BASE_URL}/users/${userId}/skill-level?view=slim`, {
     method: 'PUT',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ skillLevel }),
   })
-  return parseResponse<User>(response)
+  return parseResponse<{ skillLevel: SkillLevel; completedLessons: string[] }>(response)
 }
 
 export async function fetchLessons(userId: string): Promise<LessonTrack> {